@@ -1,2 +1,11 @@
+# -*- coding: utf-8 -*-
+
+from . import controllers
 from . import models
-from . import wizard
\ No newline at end of file
+from . import report
+from . import wizard
+
+
+def _post_init_hook(env):
+    # the sources of the facts only exist once every model of the module is set up
+    env["okr.recruitment.fact"]._rebuild()
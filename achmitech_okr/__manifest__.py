@@ -12,7 +12,7 @@ Manage staffing plans, staffing needs, and KPI metrics linked to recruitment act
     'website': "https://www.achmitech.com",
 
     'category': 'Human Resources',
-    'version': '19.0.1.0.0',
+    'version': '19.0.1.1.0',
 
     'depends': ['base', 'mail', 'hr', 'hr_recruitment', 'achmitech_hr_recruitment'],
 
@@ -27,11 +27,16 @@ Manage staffing plans, staffing needs, and KPI metrics linked to recruitment act
         'wizard/applicant_get_refuse_reason_views.xml',
         'wizard/okr_recontact_wizard_views.xml',
         'wizard/staffing_transfer_wizard_views.xml',
+        'wizard/staffing_rollover_wizard_views.xml',
+        'wizard/staffing_need_import_wizard_views.xml',
         'views/res_company_configuration.xml',
         'views/okr_node_views.xml',
         'views/okr_node_metric_views.xml',
         'views/okr_metric_definition.xml',
+        'views/okr_metric_stat_views.xml',
+        'views/okr_recompute_shard_views.xml',
         'views/okr_node_progress_inherit.xml',
+        'report/staffing_funnel_report_views.xml',
         'views/okr_menus.xml',
     ],
     # only loaded in demonstration mode
@@ -41,6 +46,7 @@ Manage staffing plans, staffing needs, and KPI metrics linked to recruitment act
         ],
     },
     
+    'post_init_hook': '_post_init_hook',
     'license': 'OPL-1',
 }
 
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+from odoo.addons.achmitech_okr.models.okr_node import HIERARCHY_PAGE_SIZE
+
+
+class OkrHierarchyController(http.Controller):
+
+    @http.route("/achmitech_okr/hierarchy/level", type="jsonrpc", auth="user")
+    def hierarchy_level(self, parent_id=False, res_id=False, domain=None, offset=0, limit=HIERARCHY_PAGE_SIZE, context=None):
+        """One page of one level of the OKR tree (see okr.node._hierarchy_level)."""
+        if context:
+            request.update_context(**context)
+        return request.env["okr.node"]._hierarchy_level(
+            parent_id=parent_id,
+            res_id=res_id,
+            domain=domain,
+            offset=offset,
+            limit=min(int(limit), HIERARCHY_PAGE_SIZE),
+        )
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    """Backfill okr.recruitment.fact on databases installed before it existed."""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["okr.recruitment.fact"]._rebuild()
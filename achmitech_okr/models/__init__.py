@@ -1,10 +1,15 @@
 from . import okr_metric_definition
+from . import okr_metric_stat
 from . import okr_node_metric
+from . import okr_node_metric_point
 from . import okr_node
+from . import okr_node_snapshot
+from . import okr_recompute_shard
 from . import res_company
 from . import res_config_settings
 from . import staffing_plan
 from . import staffing_need
 from . import okr_recontact_log
+from . import okr_recruitment_fact
 from . import hr_applicant
 from . import okr_kpi_provider
\ No newline at end of file
@@ -4,6 +4,16 @@ from odoo.exceptions import UserError
 
 from odoo import models, fields, api, _
 
+# fields read by the OKR KPIs: changing them marks the recruiters' metrics dirty
+OKR_TRACKED_APPLICANT_FIELDS = {
+    "stage_id", "presented_to_client_date", "client_interview_status", "date_first_hired",
+    "user_id", "company_id", "staffing_need_id", "active", "refuse_reason_id", "refuse_date", "date_closed",
+    "talent_pool_ids", "pool_applicant_id", "pool_added_date",
+}
+
+# key of the request-level cache of recontact logs by partner (see _get_recontact_logs_by_partner)
+RECONTACT_CACHE_KEY = "achmitech_okr.recontact_logs_by_partner"
+
 class HrApplicant(models.Model):
     _inherit = "hr.applicant"
 
@@ -56,9 +66,24 @@ class HrApplicant(models.Model):
         string="Recontacts vivier",
         compute="_compute_recontact_log_ids",
     )
+    # stored so that pool KPIs are plain indexed counts instead of EXISTS over talent_pool_ids
+    is_in_pool = fields.Boolean(
+        string="Dans le vivier",
+        compute="_compute_is_in_pool",
+        store=True,
+        index=True,
+    )
+    # recontact summary of the candidate (logs are matched on partner_id),
+    # recomputed by okr.recontact.log on create/write/unlink
     last_recontact_date = fields.Date(
         string="Dernier recontact",
-        compute="_compute_last_recontact_date",
+        compute="_compute_recontact_summary",
+        store=True,
+    )
+    recontact_count = fields.Integer(
+        string="Nombre de recontacts",
+        compute="_compute_recontact_summary",
+        store=True,
     )
 
     date_first_hired = fields.Date(
@@ -67,28 +92,62 @@ class HrApplicant(models.Model):
         help="Date à laquelle le candidat a atteint le statut embauché pour la première fois.",
     )
 
+    def _get_recontact_logs_by_partner(self):
+        """
+        Recontact logs of the candidates of these applicants -> {partner_id: okr.recontact.log}.
+
+        Logs of all missing partners are fetched with one search and kept in
+        a cache on the cursor, shared by both recontact computes for the rest
+        of the request and dropped by okr.recontact.log on any change.
+        """
+        cache = self.env.cr.cache.setdefault(RECONTACT_CACHE_KEY, {})
+        missing = set(self.partner_id.ids) - cache.keys()
+        if missing:
+            logs = self.env['okr.recontact.log'].sudo().search(
+                [('partner_id', 'in', list(missing))], order='date desc, id desc'
+            )
+            by_partner = {partner_id: [] for partner_id in missing}
+            for log in logs:
+                by_partner[log.partner_id.id].append(log.id)
+            cache.update((partner_id, tuple(ids)) for partner_id, ids in by_partner.items())
+        OkrLog = self.env['okr.recontact.log']
+        return {partner_id: OkrLog.browse(cache[partner_id]) for partner_id in self.partner_id.ids}
+
+    @api.model
+    def _invalidate_recontact_cache(self):
+        self.env.cr.cache.pop(RECONTACT_CACHE_KEY, None)
+
     @api.depends('partner_id')
     def _compute_recontact_log_ids(self):
         OkrLog = self.env['okr.recontact.log']
+        logs_by_partner = self.filtered('id')._get_recontact_logs_by_partner()
         for rec in self:
-            if not rec.id or not rec.partner_id:
-                rec.recontact_log_ids = OkrLog
-                continue
-            rec.recontact_log_ids = OkrLog.search(
-                [('partner_id', '=', rec.partner_id.id)], order='date desc, id desc'
-            )
+            rec.recontact_log_ids = logs_by_partner.get(rec.partner_id.id, OkrLog) if rec.id else OkrLog
+
+    @api.depends('talent_pool_ids')
+    def _compute_is_in_pool(self):
+        for rec in self:
+            rec.is_in_pool = bool(rec.talent_pool_ids)
 
     @api.depends('partner_id')
-    def _compute_last_recontact_date(self):
-        OkrLog = self.env['okr.recontact.log']
+    def _compute_recontact_summary(self):
+        logs_by_partner = self._get_recontact_logs_by_partner()
         for rec in self:
-            if not rec.id or not rec.partner_id:
-                rec.last_recontact_date = False
-                continue
-            last = OkrLog.search(
-                [('partner_id', '=', rec.partner_id.id)], order='date desc, id desc', limit=1
-            )
-            rec.last_recontact_date = last.date if last else False
+            # logs are ordered newest first
+            logs = logs_by_partner.get(rec.partner_id.id)
+            rec.last_recontact_date = logs[:1].date if logs else False
+            rec.recontact_count = len(logs) if logs else 0
+
+    @api.model
+    def _recompute_recontact_summary(self, partner_ids):
+        """Schedule the recontact summary of every application of these candidates."""
+        self._invalidate_recontact_cache()
+        partner_ids = [pid for pid in set(partner_ids) if pid]
+        if not partner_ids:
+            return
+        applicants = self.sudo().with_context(active_test=False).search([('partner_id', 'in', partner_ids)])
+        self.env.add_to_compute(self._fields['last_recontact_date'], applicants)
+        self.env.add_to_compute(self._fields['recontact_count'], applicants)
 
     def action_open_recontact_wizard(self):
         self.ensure_one()
@@ -132,7 +191,49 @@ class HrApplicant(models.Model):
     def _is_client_interview_stage(self, stage):
         return bool(stage and getattr(stage, "is_client_interview", False))
 
+    def _get_okr_user_ids(self):
+        """Recruiters whose KPIs read these applicants: owner and need assignees."""
+        return set((self.user_id | self.staffing_need_id.assigned_to_ids).ids)
+
+    def _get_fact_keys(self):
+        """(user_id, company_id, day) keys of okr.recruitment.fact fed by these applicants."""
+        keys = set()
+        for app in self:
+            company_id = app.company_id.id
+            for day in (app.create_date, app.date_first_hired, app.refuse_date, app.pool_added_date):
+                if day:
+                    keys.add((app.user_id.id, company_id, fields.Date.to_date(day)))
+            if app.presented_to_client_date:
+                day = fields.Date.to_date(app.presented_to_client_date)
+                keys.update((user_id, company_id, day) for user_id in app.staffing_need_id.assigned_to_ids.ids)
+        return keys
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        applicants = super().create(vals_list)
+        self.env["okr.node.metric"]._mark_dirty_for_users(applicants._get_okr_user_ids())
+        self.env["okr.recruitment.fact"]._refresh(applicants._get_fact_keys())
+        return applicants
+
     def write(self, vals):
+        tracked = OKR_TRACKED_APPLICANT_FIELDS.intersection(vals)
+        okr_user_ids = self._get_okr_user_ids() if tracked else set()
+        fact_keys = self._get_fact_keys() if tracked else set()
+        result = self._write_pipeline(vals)
+        if tracked:
+            self.env["okr.node.metric"]._mark_dirty_for_users(okr_user_ids | self._get_okr_user_ids())
+            self.env["okr.recruitment.fact"]._refresh(fact_keys | self._get_fact_keys())
+        return result
+
+    def unlink(self):
+        okr_user_ids = self._get_okr_user_ids()
+        fact_keys = self._get_fact_keys()
+        result = super().unlink()
+        self.env["okr.node.metric"]._mark_dirty_for_users(okr_user_ids)
+        self.env["okr.recruitment.fact"]._refresh(fact_keys)
+        return result
+
+    def _write_pipeline(self, vals):
         # if stage changes to a client interview stage, ensure pending (but don't overwrite passed/failed)
         if "stage_id" in vals:
             new_stage = self.env["hr.recruitment.stage"].browse(vals["stage_id"])
@@ -180,13 +281,12 @@ class HrApplicant(models.Model):
         return result
 
     def _auto_close_staffing_needs(self):
+        """Close, in one write, the assigned needs of these applicants whose positions are all filled."""
         needs = self.mapped("staffing_need_id").filtered(
             lambda n: n.state == "assigned"
         )
-        for need in needs:
-            hired = self.env["hr.applicant"].search_count([
-                ("staffing_need_id", "=", need.id),
-                ("stage_id.hired_stage", "=", True),
-            ])
-            if hired >= need.number_of_positions:
-                need.sudo().action_close()
\ No newline at end of file
+        # positions_filled depends on the applicants' stage: reading it recomputes
+        # every touched need at once with a single grouped count
+        filled = needs.filtered(lambda n: n.positions_filled >= n.number_of_positions)
+        if filled:
+            filled.sudo().action_close()
\ No newline at end of file
@@ -1,12 +1,15 @@
 # -*- coding: utf-8 -*-
-from datetime import timedelta
-from odoo import fields
+from collections import defaultdict
+from odoo.tools import SQL
 import logging
 _logger = logging.getLogger(__name__)
 
 # Registry: code -> function(env, node) -> float
 KPI_REGISTRY = {}
 
+# Batch registry: code -> function(env, nodes) -> {node_id: float}
+KPI_BATCH_REGISTRY = {}
+
 
 def kpi(code):
     def _decorator(fn):
@@ -15,84 +18,163 @@ def kpi(code):
     return _decorator
 
 
+def kpi_batch(code):
+    def _decorator(fn):
+        KPI_BATCH_REGISTRY[code] = fn
+        return fn
+    return _decorator
 
-@kpi("recruitment.need_covered_under_5d_rate")
-def kpi_need_covered_under_5d_rate(env, node):
-    if not node.date_start or not node.date_end or not node.user_id:
-        return 0.0
 
-    Need = env["staffing.need"].sudo()
+def compute_kpi_batch(env, code, nodes):
+    """
+    Evaluate the KPI `code` for all `nodes` at once -> {node_id: float}.
 
-    need_domain = [
-        ("company_id", "=", node.company_id.id),
-        ("assigned_to_ids", "in", [node.user_id.id]),
-        ("assigned_date", ">=", node.date_start),
-        ("assigned_date", "<", node.date_end),  # end exclusive
-        ("state", "!=", "draft"),
-    ]
+    Uses the batch provider when one is registered, otherwise falls back to
+    calling the single-node provider for each node (a failing node is logged
+    and scored 0.0 without affecting the others).
+    """
+    batch_fn = KPI_BATCH_REGISTRY.get(code)
+    if batch_fn:
+        values = batch_fn(env, nodes)
+        return {node.id: float(values.get(node.id, 0.0)) for node in nodes}
+
+    fn = KPI_REGISTRY.get(code)
+    if not fn:
+        raise ValueError(f"Unknown predefined KPI: {code}")
+
+    values = {}
+    for node in nodes:
+        try:
+            values[node.id] = float(fn(env, node))
+        except Exception:
+            _logger.exception("OKR KPI compute failed: kpi=%s, node=%s", code, node.id)
+            values[node.id] = 0.0
+    return values
+
+
+def _partition_nodes(nodes, dated=True):
+    """
+    Group nodes sharing the same scope so that one grouped query per scope
+    answers all of them.
+
+    Returns {(company_id, date_start, date_end): {user_id: [node_id, ...]}}.
+    Nodes missing a user, a company or (when `dated`) a period are left out;
+    their KPI value defaults to 0.0.
+    """
+    partitions = defaultdict(lambda: defaultdict(list))
+    for node in nodes:
+        if not node.user_id or not node.company_id:
+            continue
+        if dated and (not node.date_start or not node.date_end):
+            continue
+        key = (node.company_id.id, node.date_start, node.date_end) if dated else (node.company_id.id, False, False)
+        partitions[key][node.user_id.id].append(node.id)
+    return partitions
 
-    needs = Need.search(need_domain)
 
-    total_positions = 0
-    covered_positions = 0
+def _scatter(result, users, value_by_user, default=0.0):
+    """Spread per-user values back onto the nodes of a partition."""
+    for user_id, node_ids in users.items():
+        value = value_by_user.get(user_id, default)
+        for node_id in node_ids:
+            result[node_id] = value
 
-    for need in needs:
-        required = int(need.number_of_positions or 0)
-        if required <= 0 or not need.assigned_date:
-            continue
 
-        total_positions += required
 
-        assigned_dt = fields.Datetime.to_datetime(need.assigned_date)
-        deadline_date = (assigned_dt + timedelta(days=5)).date()
+def _need_coverage_by_user(env, company_id, date_start, date_end, user_ids):
+    """
+    Coverage of the needs assigned during [date_start, date_end) to each of
+    `user_ids` -> {user_id: (covered_positions, total_positions)}.
+
+    A need is covered by the applicants presented to the client within 5 days
+    of its assignment, capped at its number of positions. Presentations are
+    counted on the recruiter's own applicants, or on all applicants of the
+    need when the recruiter owns none of them.
+
+    One aggregate query: per-need stats are computed in a CTE joining
+    staffing_need, staffing_need_user_rel and hr_applicant, then summed per
+    recruiter.
+    """
+    env["staffing.need"].flush_model(["company_id", "assigned_date", "state", "number_of_positions", "assigned_to_ids"])
+    env["hr.applicant"].flush_model(["staffing_need_id", "user_id", "presented_to_client_date", "active"])
+
+    env.cr.execute(SQL(
+        """
+        WITH need_stats AS (
+            SELECT rel.user_id,
+                   n.number_of_positions AS required,
+                   COUNT(a.id) FILTER (WHERE a.user_id = rel.user_id) AS scoped_count,
+                   COUNT(a.id) FILTER (
+                       WHERE a.user_id = rel.user_id
+                         AND a.presented_to_client_date::date <= (n.assigned_date + INTERVAL '5 days')::date
+                   ) AS scoped_presented,
+                   COUNT(a.id) FILTER (
+                       WHERE a.presented_to_client_date::date <= (n.assigned_date + INTERVAL '5 days')::date
+                   ) AS all_presented
+              FROM staffing_need n
+              JOIN staffing_need_user_rel rel ON rel.need_id = n.id
+         LEFT JOIN hr_applicant a ON a.staffing_need_id = n.id AND a.active
+             WHERE n.company_id = %s
+               AND rel.user_id IN %s
+               AND n.assigned_date >= %s
+               AND n.assigned_date < %s
+               AND n.state IS DISTINCT FROM 'draft'
+               AND n.number_of_positions > 0
+          GROUP BY rel.user_id, n.id
+        )
+        SELECT user_id,
+               SUM(LEAST(required, CASE WHEN scoped_count > 0 THEN scoped_presented ELSE all_presented END)),
+               SUM(required)
+          FROM need_stats
+      GROUP BY user_id
+        """,
+        company_id, tuple(user_ids), date_start, date_end,
+    ))
+    return {user_id: (int(covered), int(total)) for user_id, covered, total in env.cr.fetchall()}
 
-        apps = need.applicant_ids
 
-        # primary: applicant responsible
-        apps_scoped = apps.filtered(lambda a: a.user_id and a.user_id.id == node.user_id.id)
+@kpi("recruitment.need_covered_under_5d_rate")
+def kpi_need_covered_under_5d_rate(env, node):
+    if not node.date_start or not node.date_end or not node.user_id or not node.company_id:
+        return 0.0
+    return kpi_need_covered_under_5d_rate_batch(env, node).get(node.id, 0.0)
 
-        # fallback: if user_id not set, consider all applicants of the need (or keep empty)
-        if not apps_scoped:
-            apps_scoped = apps
 
-        # count how many were presented within 5 days
-        presented_within_5d = 0
-        for d in apps_scoped.mapped("presented_to_client_date"):
-            if not d:
-                continue
-            # normalize to date
-            dd = fields.Date.from_string(d) if isinstance(d, str) else (d.date() if hasattr(d, "date") else d)
-            if dd and dd <= deadline_date:
-                presented_within_5d += 1
+@kpi_batch("recruitment.need_covered_under_5d_rate")
+def kpi_need_covered_under_5d_rate_batch(env, nodes):
+    result = {}
 
-        covered_positions += min(required, presented_within_5d)
+    for (company_id, date_start, date_end), users in _partition_nodes(nodes).items():
+        coverage = _need_coverage_by_user(env, company_id, date_start, date_end, list(users))
+        rates = {uid: covered / total for uid, (covered, total) in coverage.items() if total}
+        _scatter(result, users, rates)
 
-    return (covered_positions / total_positions) if total_positions else 0.0
+    return result
 
 
 @kpi("recruitment.ec_pass_rate")
 def kpi_ec_pass_rate(env, node):
     if not node.date_start or not node.date_end or not node.user_id:
         return 0.0
+    return kpi_ec_pass_rate_batch(env, node).get(node.id, 0.0)
 
-    Applicant = env["hr.applicant"].sudo()
-
-    base_domain = [
-        ("company_id", "=", node.company_id.id),
-        ("staffing_need_id", "!=", False),
-        ("staffing_need_id.assigned_to_ids", "in", [node.user_id.id]),
-        ("presented_to_client_date", ">=", node.date_start),
-        ("presented_to_client_date", "<", node.date_end),
-    ]
 
-    applicants = Applicant.search(base_domain)
-    denom = len(applicants)
-    if not denom:
-        return 0.0
+@kpi_batch("recruitment.ec_pass_rate")
+def kpi_ec_pass_rate_batch(env, nodes):
+    """
+    EC passed / presented to client, counted on the needs assigned to the
+    recruiter (a need shared by several recruiters gives full credit to each
+    of them). Range sums over okr.recruitment.fact.
+    """
+    Fact = env["okr.recruitment.fact"]
+    result = {}
 
-    num = len(applicants.filtered(lambda a: a.client_interview_status == "passed"))
-    return num / denom
+    for (company_id, date_start, date_end), users in _partition_nodes(nodes).items():
+        totals = Fact._sum_by_user(company_id, date_start, date_end, users, ("presented", "ec_passed"))
+        rates = {uid: t["ec_passed"] / t["presented"] for uid, t in totals.items() if t["presented"]}
+        _scatter(result, users, rates)
 
+    return result
 
 
 @kpi("recruitment.nok_treated_period_rate")
@@ -109,29 +191,27 @@ def kpi_nok_treated_period_rate(env, node):
     """
     if not node.date_start or not node.date_end or not node.user_id or not node.company_id:
         return 0.0
+    return kpi_nok_treated_period_rate_batch(env, node).get(node.id, 1.0)
 
-    Applicant = env["hr.applicant"].with_context(active_test=False).sudo()
 
-    base_domain = [
-        ("company_id", "=", node.company_id.id),
-        ("user_id", "=", node.user_id.id),
-        ("create_date", ">=", node.date_start),
-        ("create_date", "<", node.date_end),
-    ]
+@kpi_batch("recruitment.nok_treated_period_rate")
+def kpi_nok_treated_period_rate_batch(env, nodes):
+    """
+    Range sums over okr.recruitment.fact: `created` counts the recruiter's
+    candidates (archived included) by creation day, `resolved` those of them
+    refused (archived with a refuse reason) or hired (date_closed set).
+    """
+    Fact = env["okr.recruitment.fact"]
+    result = {}
 
-    denom = Applicant.search_count(base_domain)
-    if not denom:
-        return 1.0
+    for (company_id, date_start, date_end), users in _partition_nodes(nodes).items():
+        totals = Fact._sum_by_user(company_id, date_start, date_end, users, ("created", "resolved"))
+        rates = {uid: t["resolved"] / t["created"] for uid, t in totals.items() if t["created"]}
+        # nothing to resolve = achieved
+        _scatter(result, users, rates, default=1.0)
+
+    return result
 
-    # refused: archived with a refuse reason (excludes plain archives)
-    # hired:   date_closed set (populated automatically when entering a hired_stage)
-    resolved_domain = base_domain + [
-        "|",
-        "&", ("active", "=", False), ("refuse_reason_id", "!=", False),
-        ("date_closed", "!=", False),
-    ]
-    num = Applicant.search_count(resolved_domain)
-    return num / denom
 
 @kpi("recruitment.pool_active_count")
 def kpi_pool_active_count(env, node):
@@ -149,7 +229,7 @@ def kpi_pool_active_count(env, node):
         return 0.0
 
     pool_domain = [
-        ('talent_pool_ids', '!=', False),
+        ("is_in_pool", "=", True),
         ("user_id", "=", node.user_id.id),
         ("company_id", "=", node.company_id.id),
     ]
@@ -157,6 +237,26 @@ def kpi_pool_active_count(env, node):
     return float(env["hr.applicant"].sudo().search_count(pool_domain))
 
 
+@kpi_batch("recruitment.pool_active_count")
+def kpi_pool_active_count_batch(env, nodes):
+    Applicant = env["hr.applicant"].sudo()
+    result = {}
+
+    for (company_id, _start, _end), users in _partition_nodes(nodes, dated=False).items():
+        groups = Applicant._read_group(
+            [
+                ("is_in_pool", "=", True),
+                ("user_id", "in", list(users)),
+                ("company_id", "=", company_id),
+            ],
+            groupby=["user_id"],
+            aggregates=["__count"],
+        )
+        _scatter(result, users, {user.id: float(count) for user, count in groups})
+
+    return result
+
+
 @kpi("recruitment.pool_recontacted_rate")
 def kpi_pool_recontacted_rate(env, node):
     """
@@ -172,29 +272,59 @@ def kpi_pool_recontacted_rate(env, node):
     if not node.company_id:
         return 0.0
 
-    pool_domain = [
-        ("talent_pool_ids", "!=", False),
-        ("user_id", "=", node.user_id.id),
-        ("company_id", "=", node.company_id.id),
-    ]
-
-    pool_size = env["hr.applicant"].sudo().search_count(pool_domain)
-    if not pool_size:
-        return 0.0
+    return kpi_pool_recontacted_rate_batch(env, node).get(node.id, 0.0)
 
-    log_domain = [
-        ("date", ">=", node.date_start),
-        ("date", "<", node.date_end),
-        ("applicant_id.talent_pool_ids", "!=", False),
-        ("applicant_id.user_id", "=", node.user_id.id),
-        ("applicant_id.company_id", "=", node.company_id.id),
-        ("user_id", "=", node.user_id.id),
-    ]
 
-    logs = env["okr.recontact.log"].sudo().search(log_domain)
-    recontacted = len(logs.mapped("applicant_id"))
+@kpi_batch("recruitment.pool_recontacted_rate")
+def kpi_pool_recontacted_rate_batch(env, nodes):
+    """
+    Pool size: indexed count on `is_in_pool`. Recontacted: distinct pool
+    applicants of a recruiter recontacted by that same recruiter during the
+    period, counted in SQL.
+    """
+    Applicant = env["hr.applicant"].sudo()
+    Applicant.flush_model(["is_in_pool", "user_id", "company_id", "active"])
+    env["okr.recontact.log"].flush_model(["applicant_id", "user_id", "date"])
+    result = {}
+
+    for (company_id, date_start, date_end), users in _partition_nodes(nodes).items():
+        user_ids = tuple(users)
+        pool_sizes = {
+            user.id: count
+            for user, count in Applicant._read_group(
+                [
+                    ("is_in_pool", "=", True),
+                    ("user_id", "in", user_ids),
+                    ("company_id", "=", company_id),
+                ],
+                groupby=["user_id"],
+                aggregates=["__count"],
+            )
+        }
+        if not pool_sizes:
+            continue
 
-    return recontacted / pool_size
+        env.cr.execute(SQL(
+            """
+            SELECT l.user_id, COUNT(DISTINCT l.applicant_id)
+              FROM okr_recontact_log l
+              JOIN hr_applicant a ON a.id = l.applicant_id
+             WHERE a.is_in_pool AND a.active
+               AND a.user_id = l.user_id
+               AND a.company_id = %s
+               AND l.user_id IN %s
+               AND l.date >= %s
+               AND l.date < %s
+          GROUP BY l.user_id
+            """,
+            company_id, user_ids, date_start, date_end,
+        ))
+        recontacted = dict(env.cr.fetchall())
+
+        rates = {uid: recontacted.get(uid, 0) / size for uid, size in pool_sizes.items() if size}
+        _scatter(result, users, rates)
+
+    return result
 
 
 @kpi("recruitment.hires_count")
@@ -216,13 +346,17 @@ def kpi_hires_count(env, node):
     if not node.company_id:
         return 0.0
 
-    domain = [
-        ("user_id", "=", node.user_id.id),
-        ("stage_id.hired_stage", "=", True),
-        ("date_first_hired", ">=", node.date_start),
-        ("date_first_hired", "<", node.date_end),
-        ("active", "=", True),
-        ("company_id", "=", node.company_id.id),
-    ]
+    return kpi_hires_count_batch(env, node).get(node.id, 0.0)
+
+
+@kpi_batch("recruitment.hires_count")
+def kpi_hires_count_batch(env, nodes):
+    """Range sums over okr.recruitment.fact of active applicants in a hired stage, by date_first_hired."""
+    Fact = env["okr.recruitment.fact"]
+    result = {}
+
+    for (company_id, date_start, date_end), users in _partition_nodes(nodes).items():
+        totals = Fact._sum_by_user(company_id, date_start, date_end, users, ("hired",))
+        _scatter(result, users, {uid: float(t["hired"]) for uid, t in totals.items()})
 
-    return float(env["hr.applicant"].sudo().search_count(domain))
+    return result
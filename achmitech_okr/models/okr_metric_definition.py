@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
-from odoo import api, fields, models
+import ast
+
+from odoo import api, fields, models, tools
 from odoo.tools.safe_eval import safe_eval
 
+# per-node variables of the evaluation context (see okr.node.metric._build_eval_ctx);
+# the other variables (uid, user, env, context) are the same for every line
+NODE_VARIABLES = ("node_id", "okr_user_id", "company_id", "date_start", "date_end")
+
 
 class OkrMetricDefinition(models.Model):
     _name = "okr.metric.definition"
@@ -80,3 +86,36 @@ class OkrMetricDefinition(models.Model):
         except Exception:
             dom = []
         return dom if isinstance(dom, (list, tuple)) else []
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {"domain", "model_id"}.intersection(vals):
+            self.env.registry.clear_cache()
+        return res
+
+    @tools.ormcache("self.id")
+    def _get_domain_variables(self):
+        """Variables referenced by the domain, parsed once per definition."""
+        try:
+            tree = ast.parse((self.domain or "").strip() or "[]", mode="eval")
+        except SyntaxError:
+            return frozenset()
+        return frozenset(n.id for n in ast.walk(tree) if isinstance(n, ast.Name))
+
+    @tools.ormcache("self.id")
+    def _get_static_domain(self):
+        """Domain of a definition that references no variable, evaluated once."""
+        return tuple(self._safe_domain_eval(self.domain, {}))
+
+    def _domain_binding_key(self, eval_ctx):
+        """Values of the node variables the domain depends on: lines with the same key share a domain."""
+        self.ensure_one()
+        names = self._get_domain_variables().intersection(NODE_VARIABLES)
+        return tuple(sorted((name, eval_ctx.get(name)) for name in names))
+
+    def _get_domain(self, eval_ctx):
+        """Domain bound to the node variables of `eval_ctx`."""
+        self.ensure_one()
+        if not self._get_domain_variables():
+            return list(self._get_static_domain())
+        return self._safe_domain_eval(self.domain, eval_ctx)
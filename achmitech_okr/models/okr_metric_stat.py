@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import cProfile
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# directory where a cProfile dump of each full recompute run is written, when set
+PROFILE_DIR_ENV = "OKR_PROFILE_DIR"
+
+
+class MetricProfiler:
+    """
+    Collects the cost of the metric engine during one run.
+
+    Passed to okr.node.metric through the `okr_profiler` context key; each
+    measured block records its wall time and the number of SQL queries it
+    issued, then `save()` persists them as okr.metric.stat rows.
+    """
+
+    def __init__(self, env, name):
+        self.env = env
+        self.name = name
+        self.run_id = uuid.uuid4().hex
+        self.run_date = fields.Datetime.now()
+        self.entries = []
+
+    @contextmanager
+    def measure(self, definition, nodes):
+        cr = self.env.cr
+        queries = cr.sql_log_count
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.entries.append({
+                "run_id": self.run_id,
+                "run_name": self.name,
+                "run_date": self.run_date,
+                "definition_id": definition.id,
+                "node_id": nodes.id if len(nodes) == 1 else False,
+                "node_count": len(nodes),
+                "duration_ms": (time.perf_counter() - start) * 1000.0,
+                "query_count": cr.sql_log_count - queries,
+            })
+
+    def save(self):
+        self.env["okr.metric.stat"].sudo()._record_run(self.entries)
+
+    @classmethod
+    @contextmanager
+    def run(cls, env, name):
+        """Profile a full run; also dumps a cProfile file when OKR_PROFILE_DIR is set."""
+        profiler = cls(env, name)
+        profile_dir = os.environ.get(PROFILE_DIR_ENV)
+        profile = cProfile.Profile() if profile_dir else None
+        if profile:
+            profile.enable()
+        try:
+            yield profiler
+        finally:
+            if profile:
+                profile.disable()
+                path = os.path.join(profile_dir, f"okr_{name}_{profiler.run_id}.prof".replace(":", "_"))
+                profile.dump_stats(path)
+                _logger.info("OKR profile of run %s written to %s", name, path)
+        # not reached when the run raised: the transaction is unusable then
+        profiler.save()
+
+
+class OkrMetricStat(models.Model):
+    _name = "okr.metric.stat"
+    _description = "Statistique de calcul OKR"
+    _order = "duration_ms desc, id desc"
+    _log_access = False
+
+    run_id = fields.Char(string="Exécution", required=True, index=True, readonly=True)
+    run_name = fields.Char(string="Source", readonly=True)
+    run_date = fields.Datetime(string="Date", required=True, index=True, readonly=True)
+
+    definition_id = fields.Many2one("okr.metric.definition", string="Indicateur", ondelete="cascade", readonly=True)
+    definition_type = fields.Selection(related="definition_id.definition_type")
+    # empty when the block served several nodes at once
+    node_id = fields.Many2one("okr.node", string="Nœud", ondelete="cascade", readonly=True)
+    node_count = fields.Integer(string="Nb nœuds", readonly=True)
+
+    duration_ms = fields.Float(string="Durée (ms)", digits=(16, 2), readonly=True)
+    query_count = fields.Integer(string="Requêtes SQL", readonly=True)
+
+    @api.model
+    def _record_run(self, entries):
+        """Persist the entries of one run and keep only the last N runs of each source."""
+        if entries:
+            self.create(entries)
+
+        # retention is per source: the frequent dirty-queue drains must not
+        # evict the statistics of the full recompute shards
+        keep = int(self.env["ir.config_parameter"].sudo().get_param("achmitech_okr.metric_stat_runs", 10))
+        runs = self._read_group(
+            [], groupby=["run_name", "run_id"], aggregates=["run_date:max"], order="run_date:max desc",
+        )
+        kept = defaultdict(int)
+        stale = []
+        for run_name, run_id, _date in runs:
+            kept[run_name] += 1
+            if kept[run_name] > keep:
+                stale.append(run_id)
+        if stale:
+            self.search([("run_id", "in", stale)]).unlink()
@@ -1,8 +1,16 @@
 # -*- coding: utf-8 -*-
+from collections import defaultdict
+
 from odoo import api, fields, models
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL, float_compare
 from dateutil.relativedelta import relativedelta
 
+# fields read by the progress rollup: writing them re-runs it on the tree
+ROLLUP_FIELDS = {"parent_id", "weight", "progress_source", "progress_manual", "active"}
+# siblings returned per call of the hierarchy endpoint
+HIERARCHY_PAGE_SIZE = 50
+
 
 class OKRNode(models.Model):
     _name = "okr.node"
@@ -60,7 +68,8 @@ class OKRNode(models.Model):
 
     metric_ids = fields.One2many("okr.node.metric", "node_id", string="Indicateurs")
 
-    progress = fields.Float(string="Progression", compute="_compute_progress", store=True, recursive=True)
+    # maintained by _rollup_progress
+    progress = fields.Float(string="Progression", readonly=True, copy=False)
 
     # -------- Période engine (weekly/monthly/quarterly/custom) --------
     period_type = fields.Selection([
@@ -77,6 +86,11 @@ class OKRNode(models.Model):
     custom_date_start = fields.Date(string="Date Début Personnalisée")
     custom_date_end = fields.Date(string="Date Fin Personnalisée")
 
+    # -------- Frozen snapshot (closed periods) --------
+    is_frozen = fields.Boolean(string="Gelé", readonly=True, copy=False, index=True, tracking=True)
+    frozen_date = fields.Datetime(string="Date de gel", readonly=True, copy=False)
+    snapshot_ids = fields.One2many("okr.node.snapshot", "node_id", string="Instantanés", readonly=True)
+
     @api.onchange("progress_source")
     def _onchange_progress_source(self):
         if self.progress_source != "manual":
@@ -115,42 +129,132 @@ class OKRNode(models.Model):
                 rec.date_start = rec.custom_date_start
                 rec.date_end = rec.custom_date_end
 
-    @api.depends(
-        "child_ids.progress", "child_ids.weight",
-        "progress_source", "progress_manual",
-        "metric_ids.progress",
-    )
-    def _compute_progress(self):
-        for rec in self:
-            # 1) If has children => always rollup (OKR philosophy)
-            if rec.child_ids:
+    def _rollup_progress(self):
+        """
+        Recompute `progress` of every tree containing these nodes.
+
+        Each tree is loaded in one query through `parent_path`, together with
+        the average progress of the metric lines of each node, and rolled up
+        bottom-up in memory:
+          1) a node with active children takes the weighted average of their progress
+          2) a leaf takes the average of its metric lines or its manual progress
+
+        Changed values are written back in one UPDATE; `result` is then
+        recomputed (and tracked) by the ORM.
+        """
+        nodes = self.exists()
+        if not nodes:
+            return
+        self.env["okr.node.metric"].flush_model(["node_id", "progress"])
+        self.flush_model(["parent_id", "parent_path", "active", "weight", "progress_source", "progress_manual", "progress"])
+
+        roots = {int(path.split("/")[0]) for path in nodes.mapped("parent_path") if path}
+        if not roots:
+            return
+
+        self.env.cr.execute(SQL(
+            """
+            SELECT n.id, n.parent_id, n.parent_path, n.active, n.weight,
+                   n.progress_source, n.progress_manual, n.progress,
+                   AVG(m.progress)
+              FROM okr_node n
+         LEFT JOIN okr_node_metric m ON m.node_id = n.id
+             WHERE n.parent_path LIKE ANY(%s)
+          GROUP BY n.id
+            """,
+            [f"{root}/%" for root in roots],
+        ))
+        rows = self.env.cr.fetchall()
+
+        children = defaultdict(list)
+        for node_id, parent_id, _path, active, *_rest in rows:
+            if parent_id and active:
+                children[parent_id].append(node_id)
+
+        weight = {row[0]: row[4] or 0.0 for row in rows}
+        progress = {}
+        stored = {}
+        # deepest nodes first, so children are always computed before their parent
+        for node_id, _parent_id, path, _active, _weight, source, manual, current, metric_avg in sorted(
+            rows, key=lambda r: r[2].count("/"), reverse=True,
+        ):
+            stored[node_id] = current or 0.0
+            if children.get(node_id):
                 total_w = 0.0
                 total = 0.0
-                for ch in rec.child_ids:
-                    w = ch.weight or 0.0
+                for child_id in children[node_id]:
+                    w = weight[child_id]
                     if w <= 0:
                         continue
                     total_w += w
-                    total += (ch.progress or 0.0) * w
-                rec.progress = round(total / total_w, 2) if total_w else 0.0
-                continue
+                    total += progress[child_id] * w
+                progress[node_id] = round(total / total_w, 2) if total_w else 0.0
+            elif source == "metric":
+                progress[node_id] = round(metric_avg, 2) if metric_avg is not None else 0.0
+            elif source == "manual":
+                progress[node_id] = max(0.0, min(100.0, manual or 0.0))
+            else:
+                # leaf + children mode (no children) => 0
+                progress[node_id] = 0.0
 
-            # 2) Leaf nodes: metric/manual
-            if rec.progress_source == "metric":
-                # if multiple metrics, take average (or we can add weights later)
-                lines = rec.metric_ids
-                if lines:
-                    rec.progress = round(sum(lines.mapped("progress")) / len(lines), 2)
-                else:
-                    rec.progress = 0.0
-                continue
+        changed = {
+            node_id: value for node_id, value in progress.items()
+            if float_compare(value, stored[node_id], precision_digits=2)
+        }
+        if not changed:
+            return
 
-            if rec.progress_source == "manual":
-                rec.progress = max(0.0, min(100.0, rec.progress_manual or 0.0))
-                continue
+        self.env.cr.execute(SQL(
+            """
+            UPDATE okr_node
+               SET progress = v.progress
+              FROM (VALUES %s) AS v(id, progress)
+             WHERE okr_node.id = v.id
+            """,
+            SQL(", ").join(SQL("(%s, %s)", node_id, value) for node_id, value in changed.items()),
+        ))
+        changed_nodes = self.browse(list(changed))
+        changed_nodes.invalidate_recordset(["progress"])
+        changed_nodes.modified(["progress"])
+        changed_nodes.flush_recordset(["result"])
+
+    def _rollup_progress_on_flush(self):
+        """
+        Schedule `_rollup_progress` on these nodes for the next flush of the
+        transaction: used when the progress of their metric lines is
+        recomputed by the ORM, outside of any write.
+        """
+        node_ids = [node_id for node_id in self.ids if node_id]
+        if not node_ids:
+            return
+        pending = self.env.cr.precommit.data.setdefault("okr.node.rollup", set())
+        if not pending:
+            self.env.cr.precommit.add(self._rollup_pending_progress)
+        pending.update(node_ids)
+
+    def _rollup_pending_progress(self):
+        node_ids = self.env.cr.precommit.data.pop("okr.node.rollup", set())
+        self.env["okr.node"].sudo().browse(node_ids)._rollup_progress()
 
-            # leaf + children mode (no children) => 0
-            rec.progress = 0.0
+    @api.model_create_multi
+    def create(self, vals_list):
+        nodes = super().create(vals_list)
+        nodes._rollup_progress()
+        return nodes
+
+    def write(self, vals):
+        rollup = ROLLUP_FIELDS.intersection(vals)
+        old_parents = self.parent_id if rollup else self.browse()
+        res = super().write(vals)
+        if rollup:
+            (self | old_parents)._rollup_progress()
+        return res
+
+    def unlink(self):
+        parents = self.parent_id - self
+        res = super().unlink()
+        parents._rollup_progress()
+        return res
 
     @api.depends("progress", "date_end", "state", "success_threshold", "company_id.okr_success_points_threshold")
     def _compute_result(self):
@@ -172,10 +276,146 @@ class OKRNode(models.Model):
             else:
                 rec.result = "new"
 
+    def get_metric_sparklines(self, days=90):
+        """History of the metric lines of these nodes -> {node_id: {line_id: series}} (see okr.node.metric.get_sparklines)."""
+        series = self.metric_ids.get_sparklines(days=days)
+        return {
+            node.id: {line.id: series.get(line.id, []) for line in node.metric_ids}
+            for node in self
+        }
+
+    @api.model
+    def _hierarchy_level(self, parent_id=False, res_id=False, domain=None, offset=0, limit=HIERARCHY_PAGE_SIZE):
+        """
+        One page of one level of the OKR tree, for the lazy hierarchy view.
+
+        Returns the children of `parent_id` (or the roots matching `domain`,
+        or the node `res_id` when the view is focused on it) with their stored
+        progress and result and their number of visible children, in a single
+        query whose cost only depends on the page size:
+        {"nodes": [{...}], "total": <siblings count>}.
+        """
+        if parent_id:
+            level_domain = [("parent_id", "=", parent_id)]
+        elif res_id:
+            level_domain = [("id", "=", res_id)]
+        else:
+            level_domain = fields.Domain.AND([domain or [], [("parent_id", "=", False)]])
+        # both subqueries carry the access rules of the current user
+        level = self._search(level_domain)
+        visible = self._search([("parent_id", "!=", False)])
+
+        self.flush_model(["name", "parent_id", "user_id", "date_start", "date_end", "progress", "result", "state", "is_frozen"])
+        self.env.cr.execute(SQL(
+            """
+            WITH page AS (
+                SELECT id, COUNT(*) OVER () AS total
+                  FROM okr_node
+                 WHERE id IN (%(level)s)
+              ORDER BY id DESC
+                 LIMIT %(limit)s OFFSET %(offset)s
+            )
+            SELECT n.id, n.name, n.user_id, p.name, n.date_start, n.date_end,
+                   n.progress, n.result, n.state, n.is_frozen, c.child_count, page.total
+              FROM page
+              JOIN okr_node n ON n.id = page.id
+         LEFT JOIN res_users u ON u.id = n.user_id
+         LEFT JOIN res_partner p ON p.id = u.partner_id
+      CROSS JOIN LATERAL (
+                    SELECT COUNT(*) AS child_count
+                      FROM okr_node child
+                     WHERE child.parent_id = n.id AND child.id IN (%(visible)s)
+                 ) c
+          ORDER BY n.id DESC
+            """,
+            level=level.subselect(),
+            visible=visible.subselect(),
+            limit=limit,
+            offset=offset,
+        ))
+        rows = self.env.cr.fetchall()
+        return {
+            "nodes": [
+                {
+                    "id": node_id,
+                    "name": name,
+                    "user_id": user_id and [user_id, user_name],
+                    "date_start": fields.Date.to_string(date_start),
+                    "date_end": fields.Date.to_string(date_end),
+                    "progress": progress or 0.0,
+                    "result": result,
+                    "state": state,
+                    "is_frozen": bool(is_frozen),
+                    "child_count": child_count,
+                }
+                for node_id, name, user_id, user_name, date_start, date_end,
+                    progress, result, state, is_frozen, child_count, _total in rows
+            ],
+            "total": rows[0][-1] if rows else 0,
+        }
+
     # buttons
     def action_recompute_metrics(self):
-        self.mapped("metric_ids")._compute_current()
-        self.invalidate_recordset(["progress"])
+        self.mapped("metric_ids")._recompute()
+
+    @api.model
+    def _cron_recompute_metrics(self):
+        """
+        Full sweep; safety net for changes the dirty queue does not track (e.g. generic domains).
+        The work is split in one shard per company and period type, processed by the worker crons.
+        """
+        self.env["okr.recompute.shard"]._schedule()
+
+    def _freeze(self):
+        """Seal the final metric values of these nodes and exclude them from recompute sweeps."""
+        nodes = self.filtered(lambda n: not n.is_frozen)
+        if not nodes:
+            return
+        nodes.mapped("metric_ids")._recompute()
+
+        now = fields.Datetime.now()
+        vals_list = []
+        for node in nodes:
+            base = {
+                "node_id": node.id,
+                "sealed_date": now,
+                "date_start": node.date_start,
+                "date_end": node.date_end,
+            }
+            vals_list.append(dict(base, progress=node.progress, result=node.result))
+            vals_list.extend(
+                dict(
+                    base,
+                    metric_id=line.id,
+                    definition_id=line.definition_id.id,
+                    target=line.target,
+                    current=line.current,
+                    progress=line.progress,
+                )
+                for line in node.metric_ids
+            )
+        self.env["okr.node.snapshot"].sudo().create(vals_list)
+        nodes.write({"is_frozen": True, "frozen_date": now})
+
+    def action_unfreeze(self):
+        """Reopen frozen nodes; their snapshots are kept as history."""
+        nodes = self.filtered("is_frozen")
+        nodes.write({"is_frozen": False, "frozen_date": False})
+        nodes.mapped("metric_ids")._recompute()
+
+    @api.model
+    def _cron_freeze_closed_nodes(self):
+        today = fields.Date.context_today(self)
+        for company in self.env["res.company"].sudo().search([]):
+            cutoff = today - relativedelta(days=company.okr_freeze_grace_days or 0)
+            nodes = self.sudo().search([
+                ("company_id", "=", company.id),
+                ("progress_source", "=", "metric"),
+                ("is_frozen", "=", False),
+                ("date_end", "!=", False),
+                ("date_end", "<=", cutoff),
+            ])
+            nodes._freeze()
 
     # constraints (keep your cycle guard)
     @api.constrains("parent_id")
@@ -197,19 +437,37 @@ class OKRNode(models.Model):
         self.state = 'draft'
 
     def button_confirm(self):
-        queue = self.browse(self.ids)
-        visited = set()
+        """
+        Confirm these nodes and cascade to their draft descendants (stopping
+        at non-draft children). Descendants are loaded in one query through
+        `parent_path` and everything is confirmed in a single write.
+        """
+        self.flush_model(["parent_id", "parent_path", "state", "active"])
+        paths = [f"{path}%" for path in self.mapped("parent_path") if path]
+        children = defaultdict(list)
+        if paths:
+            self.env.cr.execute(SQL(
+                """
+                SELECT id, parent_id, state
+                  FROM okr_node
+                 WHERE active AND parent_path LIKE ANY(%s)
+                """,
+                paths,
+            ))
+            for node_id, parent_id, state in self.env.cr.fetchall():
+                if parent_id and state == 'draft':
+                    children[parent_id].append(node_id)
+
+        to_confirm = set()
+        queue = list(self.ids)
         while queue:
-            next_queue = self.env['okr.node']
-            for node in queue:
-                if node.id in visited:
-                    continue
-                visited.add(node.id)
-                node.state = 'confirmed'
-                next_queue |= node.child_ids.filtered(
-                    lambda c: c.state == 'draft' and c.id not in visited
-                )
-            queue = next_queue
+            node_id = queue.pop()
+            if node_id in to_confirm:
+                continue
+            to_confirm.add(node_id)
+            queue.extend(children[node_id])
+
+        self.browse(sorted(to_confirm)).write({'state': 'confirmed'})
 
     def button_cancel(self):
         self.state = 'cancelled'
\ No newline at end of file
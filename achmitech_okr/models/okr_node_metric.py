@@ -1,13 +1,21 @@
 # -*- coding: utf-8 -*-
+from collections import defaultdict
+from contextlib import nullcontext
+
 from odoo import api, fields, models
 from odoo.exceptions import MissingError
 
 import logging
 
-from odoo.addons.achmitech_okr.models.okr_kpi_provider import KPI_REGISTRY
+from odoo.addons.achmitech_okr.models.okr_kpi_provider import compute_kpi_batch
+from odoo.addons.achmitech_okr.models.okr_metric_stat import MetricProfiler
 
 _logger = logging.getLogger(__name__)
 
+# domain variables that tie a query to a single owner, preventing grouping by assigned_to_ids
+OWNER_VARIABLES = {"okr_user_id", "node_id"}
+GROUPED_OWNERS = "grouped"
+
 
 class OkrNodeMetric(models.Model):
     _name = "okr.node.metric"
@@ -15,7 +23,7 @@ class OkrNodeMetric(models.Model):
     _order = "sequence, id"
 
     sequence = fields.Integer(default=10)
-    node_id = fields.Many2one("okr.node", required=True, ondelete="cascade")
+    node_id = fields.Many2one("okr.node", required=True, ondelete="cascade", index=True)
     definition_id = fields.Many2one("okr.metric.definition", required=True, ondelete="cascade")
 
     target = fields.Float(required=True)
@@ -23,6 +31,9 @@ class OkrNodeMetric(models.Model):
     current = fields.Float(compute="_compute_current", store=True, readonly=True)
     progress = fields.Float(compute="_compute_current", store=True, readonly=True)
 
+    # set when source data of the line changed; drained by ir_cron_okr_process_dirty_metrics
+    is_dirty = fields.Boolean(index=True, copy=False, readonly=True)
+
 
     def _build_eval_ctx(self):
         self.ensure_one()
@@ -42,6 +53,89 @@ class OkrNodeMetric(models.Model):
             "date_end": n.date_end,
         }
 
+    def _measure(self, definition, nodes):
+        """Time a block of the engine when a run is profiled (see MetricProfiler)."""
+        profiler = self.env.context.get("okr_profiler")
+        return profiler.measure(definition, nodes) if profiler else nullcontext()
+
+    def _compute_predefined_values(self):
+        """Evaluate each predefined KPI definition once for all its lines -> {line_id: value}."""
+        lines_by_definition = defaultdict(lambda: self.browse())
+        for line in self:
+            d = line.definition_id
+            if d.definition_type == "predefined":
+                lines_by_definition[d] |= line
+
+        values = {}
+        # one batch call per definition, so that its cost is recorded against it when profiled
+        for d, lines in lines_by_definition.items():
+            try:
+                with self._measure(d, lines.node_id):
+                    by_node = compute_kpi_batch(self.env, d.predefined_kpi, lines.node_id)
+            except Exception:
+                _logger.exception("OKR batch KPI compute failed: kpi=%s, nodes=%s", d.predefined_kpi, lines.node_id.ids)
+                by_node = {}
+            for line in lines:
+                values[line.id] = by_node.get(line.node_id.id, 0.0)
+        return values
+
+    def _compute_domain_values(self):
+        """
+        Evaluate domain definitions -> {line_id: value}.
+
+        Lines sharing a definition and its bound node variables (typically the
+        period) are answered together: when the model has `assigned_to_ids`,
+        one `_read_group` grouped by `assigned_to_ids` serves every owner and
+        the result is scattered back to each line. Domains that reference the
+        owner themselves (`okr_user_id`, `node_id`) cannot be grouped and fall
+        back to one query per owner.
+        """
+        groups = defaultdict(lambda: self.browse())
+        for line in self:
+            d = line.definition_id
+            if d.definition_type != "domain" or not d.model_name or d.model_name not in self.env:
+                continue
+            eval_ctx = line._build_eval_ctx()
+            okr_uid = eval_ctx["okr_user_id"]
+            # owner scope ONLY if model supports it
+            if not okr_uid or "assigned_to_ids" not in self.env[d.model_name]._fields:
+                owner = False
+            elif OWNER_VARIABLES.isdisjoint(d._get_domain_variables()):
+                owner = GROUPED_OWNERS
+            else:
+                owner = okr_uid
+            groups[(d.id, d._domain_binding_key(eval_ctx), owner)] |= line
+
+        values = {}
+        for (_def_id, _binding, owner), lines in groups.items():
+            d = lines[0].definition_id
+            agg = "__count" if d.aggregation == "count" else f"{d.value_field_id.name}:sum"
+            try:
+                Model = self.env[d.model_name].sudo()
+                domain = d._get_domain(lines[0]._build_eval_ctx())
+
+                if owner == GROUPED_OWNERS:
+                    user_ids = lines.node_id.user_id.ids
+                    domain = fields.Domain.AND([domain, [("assigned_to_ids", "in", user_ids)]])
+                    with self._measure(d, lines.node_id):
+                        rows = Model._read_group(domain, groupby=["assigned_to_ids"], aggregates=[agg])
+                    by_user = {user.id: float(value or 0.0) for user, value in rows}
+                    for line in lines:
+                        values[line.id] = by_user.get(line.node_id.user_id.id, 0.0)
+                    continue
+
+                if owner:
+                    domain = fields.Domain.AND([domain, [("assigned_to_ids", "in", [owner])]])
+                with self._measure(d, lines.node_id):
+                    res = Model._read_group(domain, aggregates=[agg])
+                current = float(res[0][0]) if res and res[0] and res[0][0] is not None else 0.0
+            except Exception:
+                _logger.exception("OKR metric compute failed: lines=%s, def=%s", lines.ids, d.name)
+                current = 0.0
+            for line in lines:
+                values[line.id] = current
+        return values
+
     @api.depends(
     "definition_id", "definition_id.domain", "definition_id.aggregation", "definition_id.value_field_id",
     "definition_id.definition_type", "definition_id.predefined_kpi",
@@ -49,8 +143,14 @@ class OkrNodeMetric(models.Model):
     "node_id.company_id", "node_id.date_start", "node_id.date_end", "node_id.user_id",
     )
     def _compute_current(self):
+        sealed_values = self._get_sealed_values()
+        live = self - self.browse(list(sealed_values))
+        predefined_values = live._compute_predefined_values()
+        domain_values = live._compute_domain_values()
         for line in self:
-            current = 0.0
+            if line.id in sealed_values:
+                line.current, line.progress = sealed_values[line.id]
+                continue
 
             d = line.definition_id
             if not d:
@@ -58,44 +158,11 @@ class OkrNodeMetric(models.Model):
                 line.progress = 0.0
                 continue
 
-            eval_ctx = line._build_eval_ctx()
-            node = line.node_id
-            env = line.env
-
-            try:
-                if d.definition_type == "predefined":
-                    fn = KPI_REGISTRY.get(d.predefined_kpi)
-                    if not fn:
-                        raise ValueError(f"Unknown predefined KPI: {d.predefined_kpi}")
-
-                    current = float(fn(env, node))
-
-                elif d.definition_type == "code":
-                    current = 0.0
-
-                else:
-                    # DOMAIN branch ONLY
-                    if not d.model_name:
-                        current = 0.0
-                    else:
-                        Model = env[d.model_name].sudo()
-                        domain = d._safe_domain_eval(d.domain, eval_ctx)
-
-                        # (optional) owner scope ONLY if model supports it
-                        okr_uid = eval_ctx.get("okr_user_id")
-                        if okr_uid and "assigned_to_ids" in Model._fields:
-                            domain = fields.Domain.AND([domain, [("assigned_to_ids", "in", [okr_uid])]])
-
-                        if d.aggregation == "count":
-                            current = float(Model.search_count(domain))
-                        else:
-                            field = d.value_field_id.name
-                            agg = f"{field}:sum"
-                            res = Model._read_group(domain, aggregates=[agg])
-                            current = float(res[0][0]) if res and res[0] and res[0][0] is not None else 0.0
-
-            except Exception:
-                _logger.exception("OKR metric compute failed: node=%s, line=%s, def=%s", node.id, line.id, d.name)
+            if d.definition_type == "predefined":
+                current = predefined_values.get(line.id, 0.0)
+            elif d.definition_type == "domain":
+                current = domain_values.get(line.id, 0.0)
+            else:
                 current = 0.0
 
             target = line.target or 0.0
@@ -103,4 +170,88 @@ class OkrNodeMetric(models.Model):
             progress = max(0.0, progress)
 
             line.current = round(current, 4)
-            line.progress = round(progress, 2)
\ No newline at end of file
+            line.progress = round(progress, 2)
+        # the stored progress may change without a write (period, owner, definition...)
+        self.node_id._rollup_progress_on_flush()
+
+    def _get_sealed_values(self):
+        """Latest snapshot of lines belonging to frozen nodes -> {line_id: (current, progress)}."""
+        frozen = self.filtered(lambda l: l.node_id.is_frozen and isinstance(l.id, int))
+        if not frozen:
+            return {}
+        sealed = {}
+        snapshots = self.env["okr.node.snapshot"].sudo().search([("metric_id", "in", frozen.ids)])
+        for snap in snapshots:  # ordered newest first
+            sealed.setdefault(snap.metric_id.id, (snap.current, snap.progress))
+        return sealed
+
+    def _recompute(self):
+        """Re-run the metric engine on these lines and clear their dirty flag."""
+        self._compute_current()
+        self.env["okr.node.metric.point"].sudo()._record(self)
+        self.filtered("is_dirty").write({"is_dirty": False})
+        self.node_id._rollup_progress()
+
+    def get_sparklines(self, days=90):
+        """
+        Recorded history of these lines over the last `days` days, read in one
+        query -> {line_id: [[ts, current, progress], ...]}. Lines the user
+        cannot read are left out.
+        """
+        lines = self._filtered_access("read")
+        date_from = fields.Datetime.subtract(fields.Datetime.now(), days=days)
+        series = self.env["okr.node.metric.point"].sudo()._get_series(lines.ids, date_from)
+        return {
+            line_id: [[fields.Datetime.to_string(ts), current, progress] for ts, current, progress in points]
+            for line_id, points in series.items()
+        }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines.node_id._rollup_progress()
+        return lines
+
+    def write(self, vals):
+        rollup = {"node_id", "definition_id", "target"}.intersection(vals)
+        old_nodes = self.node_id if rollup else self.env["okr.node"]
+        res = super().write(vals)
+        if rollup:
+            (old_nodes | self.node_id)._rollup_progress()
+        return res
+
+    def unlink(self):
+        nodes = self.node_id
+        res = super().unlink()
+        nodes._rollup_progress()
+        return res
+
+    @api.model
+    def _mark_dirty_for_users(self, user_ids):
+        """Flag the metric lines of the given recruiters for the next queue drain."""
+        user_ids = [uid for uid in set(user_ids) if uid]
+        if not user_ids:
+            return
+        lines = self.sudo().search([
+            ("is_dirty", "=", False),
+            ("node_id.user_id", "in", user_ids),
+            ("node_id.is_frozen", "=", False),
+            ("node_id.progress_source", "=", "metric"),
+            ("definition_id.definition_type", "!=", "code"),
+        ])
+        if not lines:
+            return
+        lines.write({"is_dirty": True})
+        cron = self.env.ref("achmitech_okr.ir_cron_okr_process_dirty_metrics", raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model
+    def _cron_process_dirty_metrics(self, batch_size=500):
+        lines = self.sudo().search([("is_dirty", "=", True)], limit=batch_size)
+        if not lines:
+            return
+        with MetricProfiler.run(self.env, "dirty") as profiler:
+            lines.with_context(okr_profiler=profiler)._recompute()
+        if self.sudo().search_count([("is_dirty", "=", True)], limit=1):
+            self.env.ref("achmitech_okr.ir_cron_okr_process_dirty_metrics")._trigger()
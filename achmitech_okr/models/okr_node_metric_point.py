@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+# downsampling steps: (resolution, date_trunc unit, finer resolutions, config parameter, default age in days)
+DOWNSAMPLING = (
+    ("day", "day", ("raw",), "achmitech_okr.metric_point_raw_days", 30),
+    ("week", "week", ("raw", "day"), "achmitech_okr.metric_point_daily_days", 365),
+)
+
+
+class OkrNodeMetricPoint(models.Model):
+    """
+    History of a metric line: one (ts, current, progress) point per recompute
+    that changed its value.
+
+    Recent points are kept as recorded; older ones are collapsed to one point
+    per day, then per week (last value of the bucket), by the daily
+    `_cron_downsample`.
+    """
+    _name = "okr.node.metric.point"
+    _description = "Historique d'indicateur OKR"
+    _order = "metric_id, ts"
+    _log_access = False
+
+    metric_id = fields.Many2one("okr.node.metric", required=True, ondelete="cascade", readonly=True)
+    ts = fields.Datetime(string="Date", required=True, readonly=True)
+    current = fields.Float(readonly=True)
+    progress = fields.Float(string="Progression", readonly=True)
+    resolution = fields.Selection(
+        [("raw", "Brut"), ("day", "Jour"), ("week", "Semaine")],
+        default="raw", required=True, readonly=True,
+    )
+
+    _metric_ts_idx = models.Index("(metric_id, ts)")
+
+    @api.model
+    def _record(self, lines):
+        """Append a point for each line whose value differs from its latest point."""
+        lines = lines.filtered(lambda l: isinstance(l.id, int) and not l.node_id.is_frozen)
+        if not lines:
+            return
+        values = SQL(", ").join(
+            SQL("(%s, %s::double precision, %s::double precision)", line.id, line.current, line.progress)
+            for line in lines
+        )
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO %(table)s (metric_id, ts, current, progress, resolution)
+            SELECT v.metric_id, %(now)s, v.current, v.progress, 'raw'
+              FROM (VALUES %(values)s) AS v(metric_id, current, progress)
+         LEFT JOIN LATERAL (
+                       SELECT p.current, p.progress
+                         FROM %(table)s p
+                        WHERE p.metric_id = v.metric_id
+                     ORDER BY p.ts DESC
+                        LIMIT 1
+                   ) last ON TRUE
+             WHERE last.current IS DISTINCT FROM v.current
+                OR last.progress IS DISTINCT FROM v.progress
+            """,
+            table=SQL.identifier(self._table),
+            now=fields.Datetime.now(),
+            values=values,
+        ))
+
+    @api.model
+    def _get_series(self, metric_ids, date_from):
+        """
+        Points of the given metric lines since `date_from`, in one query
+        -> {metric_id: [(ts, current, progress), ...]}.
+
+        The last point before `date_from` is included as the starting value,
+        since unchanged values are not recorded again.
+        """
+        if not metric_ids:
+            return {}
+        self.flush_model()
+        self.env.cr.execute(SQL(
+            """
+            SELECT metric_id,
+                   array_agg(ts ORDER BY ts),
+                   array_agg(current ORDER BY ts),
+                   array_agg(progress ORDER BY ts)
+              FROM (
+                    SELECT metric_id, ts, current, progress
+                      FROM %(table)s
+                     WHERE metric_id = ANY(%(ids)s) AND ts >= %(date_from)s
+                 UNION ALL
+                   (SELECT DISTINCT ON (metric_id) metric_id, ts, current, progress
+                      FROM %(table)s
+                     WHERE metric_id = ANY(%(ids)s) AND ts < %(date_from)s
+                  ORDER BY metric_id, ts DESC)
+                   ) AS points
+          GROUP BY metric_id
+            """,
+            table=SQL.identifier(self._table),
+            ids=list(metric_ids),
+            date_from=date_from,
+        ))
+        return {
+            metric_id: list(zip(stamps, currents, progresses))
+            for metric_id, stamps, currents, progresses in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _cron_downsample(self):
+        """Collapse old points to one per day, then one per week."""
+        ICP = self.env["ir.config_parameter"].sudo()
+        now = fields.Datetime.now()
+        for resolution, unit, finer, param, default_days in DOWNSAMPLING:
+            before = fields.Datetime.subtract(now, days=int(ICP.get_param(param, default_days)))
+            # only complete buckets are collapsed, so each bucket is rewritten at most once
+            self.env.cr.execute(SQL(
+                """
+                WITH moved AS (
+                    DELETE FROM %(table)s
+                     WHERE resolution IN %(finer)s AND ts < date_trunc(%(unit)s, %(before)s::timestamp)
+                 RETURNING metric_id, ts, current, progress
+                )
+                INSERT INTO %(table)s (metric_id, ts, current, progress, resolution)
+                SELECT metric_id, date_trunc(%(unit)s, ts),
+                       (array_agg(current ORDER BY ts DESC))[1],
+                       (array_agg(progress ORDER BY ts DESC))[1],
+                       %(resolution)s
+                  FROM moved
+              GROUP BY metric_id, date_trunc(%(unit)s, ts)
+                """,
+                table=SQL.identifier(self._table),
+                finer=finer,
+                unit=unit,
+                before=before,
+                resolution=resolution,
+            ))
+        self.invalidate_model()
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from odoo import _, fields, models
+from odoo.exceptions import UserError
+
+
+class OkrNodeSnapshot(models.Model):
+    _name = "okr.node.snapshot"
+    _description = "Instantané OKR (période clôturée)"
+    _order = "sealed_date desc, id desc"
+
+    node_id = fields.Many2one("okr.node", required=True, ondelete="cascade", index=True)
+    # empty on the node-level row
+    metric_id = fields.Many2one("okr.node.metric", ondelete="cascade", index=True)
+    definition_id = fields.Many2one("okr.metric.definition", ondelete="set null")
+
+    sealed_date = fields.Datetime(string="Date de gel", required=True, default=fields.Datetime.now)
+    date_start = fields.Date(string="Date Début")
+    date_end = fields.Date(string="Date Fin")
+
+    target = fields.Float()
+    current = fields.Float()
+    progress = fields.Float(string="Progression")
+    result = fields.Selection(
+        [("new", "Nouveau"), ("inprogress", "En Cours"), ("successful", "Réussi"), ("failed", "Échoué")],
+        string="Result",
+    )
+
+    def write(self, vals):
+        raise UserError(_("Les instantanés OKR sont immuables."))
+
+    def unlink(self):
+        raise UserError(_("Les instantanés OKR sont immuables."))
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+from odoo.addons.achmitech_okr.models.okr_metric_stat import MetricProfiler
+
+_logger = logging.getLogger(__name__)
+
+WORKER_CRONS = (
+    "achmitech_okr.ir_cron_okr_recompute_shard_worker_1",
+    "achmitech_okr.ir_cron_okr_recompute_shard_worker_2",
+)
+# a running shard without heartbeat for that long is considered crashed and resumed
+STALE_AFTER = timedelta(minutes=15)
+# stop and re-trigger after that many seconds to stay below the cron time limit
+TIME_BUDGET = 300
+
+
+class OkrRecomputeShard(models.Model):
+    _name = "okr.recompute.shard"
+    _description = "Lot de recalcul OKR"
+    _order = "company_id, period_type"
+
+    company_id = fields.Many2one("res.company", required=True, ondelete="cascade", readonly=True)
+    period_type = fields.Selection([
+        ("none", "None"),
+        ("week", "Hebdomadaire"),
+        ("month", "Mensuel"),
+        ("quarter", "Trimestriel"),
+        ("custom", "Période Personnalisée"),
+    ], string="Période", required=True, readonly=True)
+
+    state = fields.Selection([
+        ("pending", "En attente"),
+        ("running", "En cours"),
+        ("done", "Terminé"),
+        ("failed", "Échoué"),
+    ], default="pending", required=True, readonly=True, index=True)
+
+    # checkpoint: nodes are processed by increasing id, everything up to last_node_id is committed
+    last_node_id = fields.Integer(string="Dernier nœud traité", readonly=True)
+    node_done = fields.Integer(string="Nœuds traités", readonly=True)
+    node_total = fields.Integer(string="Nœuds", readonly=True)
+    heartbeat = fields.Datetime(string="Dernière activité", readonly=True)
+    date_scheduled = fields.Datetime(string="Planifié le", readonly=True)
+    date_done = fields.Datetime(string="Terminé le", readonly=True)
+    error = fields.Text(string="Erreur", readonly=True)
+
+    _unique_company_period = models.Constraint(
+        "UNIQUE(company_id, period_type)",
+        "Un lot existe déjà pour cette société et cette période.",
+    )
+
+    def _get_node_domain(self):
+        self.ensure_one()
+        return [
+            ("company_id", "=", self.company_id.id),
+            ("period_type", "=", self.period_type),
+            ("progress_source", "=", "metric"),
+            ("is_frozen", "=", False),
+        ]
+
+    @api.model
+    def _trigger_workers(self):
+        for xmlid in WORKER_CRONS:
+            cron = self.env.ref(xmlid, raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger()
+
+    @api.model
+    def _schedule(self):
+        """
+        (Re)open one shard per company and period type holding live metric nodes.
+
+        Shards still running are not restarted: a live one is left to its
+        worker, a stale one is resumed from its last checkpoint.
+        """
+        groups = self.env["okr.node"].sudo()._read_group(
+            [("progress_source", "=", "metric"), ("is_frozen", "=", False)],
+            groupby=["company_id", "period_type"],
+            aggregates=["__count"],
+        )
+        existing = {(s.company_id.id, s.period_type): s for s in self.sudo().search([])}
+        now = fields.Datetime.now()
+        for company, period_type, count in groups:
+            shard = existing.get((company.id, period_type))
+            if shard and shard.state == "running":
+                # a live worker holds the shard: leave it alone; a crashed one
+                # resumes from its checkpoint instead of restarting the range
+                if shard.heartbeat and shard.heartbeat >= now - STALE_AFTER:
+                    continue
+                shard.write({"state": "pending", "heartbeat": False, "error": False})
+                continue
+            vals = {
+                "state": "pending",
+                "last_node_id": 0,
+                "node_done": 0,
+                "node_total": count,
+                "heartbeat": False,
+                "date_scheduled": now,
+                "date_done": False,
+                "error": False,
+            }
+            if shard:
+                shard.write(vals)
+            else:
+                self.sudo().create(dict(vals, company_id=company.id, period_type=period_type))
+        self._trigger_workers()
+
+    def action_retrigger(self):
+        """Resume failed or stale shards from their checkpoint."""
+        self.write({"state": "pending", "error": False})
+        self._trigger_workers()
+
+    def action_restart(self):
+        """Recompute shards from scratch."""
+        self.write({"state": "pending", "last_node_id": 0, "node_done": 0, "error": False})
+        self._trigger_workers()
+
+    @api.model
+    def _claim(self):
+        """Lock and mark as running the next pending (or crashed) shard, if any."""
+        self.env.cr.execute(SQL(
+            """
+            SELECT id
+              FROM okr_recompute_shard
+             WHERE state = 'pending'
+                OR (state = 'running' AND (heartbeat IS NULL OR heartbeat < %s))
+          ORDER BY id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+            """,
+            fields.Datetime.now() - STALE_AFTER,
+        ))
+        row = self.env.cr.fetchone()
+        if not row:
+            return self.browse()
+        shard = self.browse(row[0])
+        shard.write({"state": "running", "heartbeat": fields.Datetime.now()})
+        self.env.cr.commit()
+        return shard
+
+    def _process(self, deadline, batch_size=50):
+        """Recompute the shard nodes after the checkpoint, committing after each batch."""
+        self.ensure_one()
+        Node = self.env["okr.node"].sudo()
+        with MetricProfiler.run(self.env, f"shard:{self.company_id.id}:{self.period_type}") as profiler:
+            while time.monotonic() < deadline:
+                nodes = Node.search(
+                    self._get_node_domain() + [("id", ">", self.last_node_id)],
+                    order="id",
+                    limit=batch_size,
+                )
+                if not nodes:
+                    self.write({"state": "done", "date_done": fields.Datetime.now(), "heartbeat": fields.Datetime.now()})
+                    self.env.cr.commit()
+                    return True
+                nodes.mapped("metric_ids").with_context(okr_profiler=profiler)._recompute()
+                self.write({
+                    "last_node_id": nodes[-1].id,
+                    "node_done": self.node_done + len(nodes),
+                    "heartbeat": fields.Datetime.now(),
+                })
+                self.env.cr.commit()
+        return False
+
+    @api.model
+    def _cron_process_shards(self):
+        deadline = time.monotonic() + TIME_BUDGET
+        while time.monotonic() < deadline:
+            shard = self.sudo()._claim()
+            if not shard:
+                return
+            try:
+                finished = shard._process(deadline)
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.exception("OKR shard recompute failed: shard=%s", shard.id)
+                shard.write({"state": "failed", "error": str(e)})
+                self.env.cr.commit()
+                continue
+            if not finished:
+                # out of time: leave the shard claimable and hand over to the next run
+                shard.write({"state": "pending"})
+                self.env.cr.commit()
+                break
+        self._trigger_workers()
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from odoo import fields, models
+from odoo import api, fields, models
 
 OUTCOME_SELECTION = [
     ("interested", "Toujours intéressé"),
@@ -9,6 +9,9 @@ OUTCOME_SELECTION = [
     ("callback", "Rappel à prévoir"),
 ]
 
+# fields feeding okr.recruitment.fact and the recruiters' metrics
+OKR_TRACKED_LOG_FIELDS = {"user_id", "date", "applicant_id"}
+
 
 class OkrRecontactLog(models.Model):
     _name = "okr.recontact.log"
@@ -30,3 +33,42 @@ class OkrRecontactLog(models.Model):
     referral_name = fields.Char(string="Nom du recommandé")
     referral_contact = fields.Char(string="Contact du recommandé")
     next_contact_date = fields.Date(string="Prochain contact")
+
+    def _get_fact_keys(self):
+        """(user_id, company_id, day) keys of okr.recruitment.fact fed by these logs."""
+        return {(log.user_id.id, log.applicant_id.company_id.id, log.date) for log in self}
+
+    def _get_okr_user_ids(self):
+        """Recruiters whose metrics read these logs: the author and the applicant owner."""
+        return (self.user_id | self.applicant_id.user_id).ids
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        logs = super().create(vals_list)
+        self.env["okr.node.metric"]._mark_dirty_for_users(logs._get_okr_user_ids())
+        self.env["okr.recruitment.fact"]._refresh(logs._get_fact_keys())
+        self.env["hr.applicant"]._recompute_recontact_summary(logs.partner_id.ids)
+        return logs
+
+    def write(self, vals):
+        partner_ids = self.partner_id.ids if {"partner_id", "date"}.intersection(vals) else []
+        tracked = OKR_TRACKED_LOG_FIELDS.intersection(vals)
+        fact_keys = self._get_fact_keys() if tracked else set()
+        okr_user_ids = self._get_okr_user_ids() if tracked else []
+        res = super().write(vals)
+        if tracked:
+            self.env["okr.recruitment.fact"]._refresh(fact_keys | self._get_fact_keys())
+            self.env["okr.node.metric"]._mark_dirty_for_users(okr_user_ids + self._get_okr_user_ids())
+        if partner_ids:
+            self.env["hr.applicant"]._recompute_recontact_summary(partner_ids + self.partner_id.ids)
+        return res
+
+    def unlink(self):
+        partner_ids = self.partner_id.ids
+        fact_keys = self._get_fact_keys()
+        okr_user_ids = self._get_okr_user_ids()
+        res = super().unlink()
+        self.env["okr.recruitment.fact"]._refresh(fact_keys)
+        self.env["okr.node.metric"]._mark_dirty_for_users(okr_user_ids)
+        self.env["hr.applicant"]._recompute_recontact_summary(partner_ids)
+        return res
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+MEASURES = ("created", "resolved", "presented", "ec_passed", "hired", "refused", "pooled", "recontacted")
+
+# One subquery per family of measures, each yielding (user_id, company_id, day, <measures>).
+# Keys follow the KPI scoping rules:
+#   - created/resolved/hired/refused/pooled: applicant owner, on the day of the event
+#   - presented/ec_passed: every recruiter assigned to the applicant's need, on the presentation day
+#   - recontacted: author of the log, on the log date
+_FACT_SOURCES = {
+    "created": """
+        SELECT a.user_id, a.company_id, a.create_date::date AS day,
+               COUNT(*) AS created,
+               COUNT(*) FILTER (
+                   WHERE (NOT a.active AND a.refuse_reason_id IS NOT NULL) OR a.date_closed IS NOT NULL
+               ) AS resolved
+          FROM hr_applicant a
+         WHERE a.user_id IS NOT NULL AND a.company_id IS NOT NULL AND {where}
+      GROUP BY 1, 2, 3
+    """,
+    "presented": """
+        SELECT rel.user_id, a.company_id, a.presented_to_client_date::date AS day,
+               COUNT(*) AS presented,
+               COUNT(*) FILTER (WHERE a.client_interview_status = 'passed') AS ec_passed
+          FROM hr_applicant a
+          JOIN staffing_need_user_rel rel ON rel.need_id = a.staffing_need_id
+         WHERE a.active AND a.presented_to_client_date IS NOT NULL AND a.company_id IS NOT NULL AND {where}
+      GROUP BY 1, 2, 3
+    """,
+    "hired": """
+        SELECT a.user_id, a.company_id, a.date_first_hired AS day,
+               COUNT(*) AS hired
+          FROM hr_applicant a
+          JOIN hr_recruitment_stage s ON s.id = a.stage_id
+         WHERE a.active AND s.hired_stage AND a.date_first_hired IS NOT NULL
+           AND a.user_id IS NOT NULL AND a.company_id IS NOT NULL AND {where}
+      GROUP BY 1, 2, 3
+    """,
+    "refused": """
+        SELECT a.user_id, a.company_id, a.refuse_date::date AS day,
+               COUNT(*) AS refused
+          FROM hr_applicant a
+         WHERE NOT a.active AND a.refuse_reason_id IS NOT NULL AND a.refuse_date IS NOT NULL
+           AND a.user_id IS NOT NULL AND a.company_id IS NOT NULL AND {where}
+      GROUP BY 1, 2, 3
+    """,
+    "pooled": """
+        SELECT a.user_id, a.company_id, a.pool_added_date AS day,
+               COUNT(*) AS pooled
+          FROM hr_applicant a
+         WHERE a.pool_added_date IS NOT NULL
+           AND a.user_id IS NOT NULL AND a.company_id IS NOT NULL AND {where}
+      GROUP BY 1, 2, 3
+    """,
+    "recontacted": """
+        SELECT l.user_id, a.company_id, l.date AS day,
+               COUNT(*) AS recontacted
+          FROM okr_recontact_log l
+          JOIN hr_applicant a ON a.id = l.applicant_id
+         WHERE l.user_id IS NOT NULL AND a.company_id IS NOT NULL AND {where}
+      GROUP BY 1, 2, 3
+    """,
+}
+# (user, day) expressions of each source, used to restrict a refresh to the touched keys
+_SOURCE_KEY = {
+    "created": ("a.user_id", "a.create_date::date"),
+    "presented": ("rel.user_id", "a.presented_to_client_date::date"),
+    "hired": ("a.user_id", "a.date_first_hired"),
+    "refused": ("a.user_id", "a.refuse_date::date"),
+    "pooled": ("a.user_id", "a.pool_added_date"),
+    "recontacted": ("l.user_id", "l.date"),
+}
+# measures produced by each source
+_SOURCE_MEASURES = {
+    "created": ("created", "resolved"),
+    "presented": ("presented", "ec_passed"),
+    "hired": ("hired",),
+    "refused": ("refused",),
+    "pooled": ("pooled",),
+    "recontacted": ("recontacted",),
+}
+
+
+class OkrRecruitmentFact(models.Model):
+    """
+    Daily recruitment counters per recruiter and company, materialized from
+    hr.applicant and okr.recontact.log so that KPIs over any period are
+    range sums over a small table.
+
+    Maintained incrementally: writers collect the (user_id, company_id, day)
+    keys they touch, before and after the change, and `_refresh` re-aggregates
+    only those keys.
+    """
+    _name = "okr.recruitment.fact"
+    _description = "Faits de recrutement (par recruteur et par jour)"
+    _order = "day desc"
+    _log_access = False
+
+    user_id = fields.Many2one("res.users", string="Recruteur", required=True, ondelete="cascade", readonly=True)
+    company_id = fields.Many2one("res.company", required=True, ondelete="cascade", readonly=True)
+    day = fields.Date(string="Jour", required=True, readonly=True)
+
+    created = fields.Integer(string="Créés", readonly=True)
+    resolved = fields.Integer(string="Créés et traités", readonly=True)
+    presented = fields.Integer(string="Présentés", readonly=True)
+    ec_passed = fields.Integer(string="EC terminés", readonly=True)
+    hired = fields.Integer(string="Embauchés", readonly=True)
+    refused = fields.Integer(string="Refusés", readonly=True)
+    pooled = fields.Integer(string="Ajoutés au vivier", readonly=True)
+    recontacted = fields.Integer(string="Recontacts", readonly=True)
+
+    _unique_key = models.Constraint(
+        "UNIQUE(company_id, user_id, day)",
+        "Un seul fait par recruteur, société et jour.",
+    )
+
+    def _flush_sources(self):
+        self.env["hr.applicant"].flush_model([
+            "user_id", "company_id", "active", "refuse_reason_id", "refuse_date", "date_closed",
+            "presented_to_client_date", "client_interview_status", "staffing_need_id",
+            "stage_id", "date_first_hired", "pool_added_date",
+        ])
+        self.env["staffing.need"].flush_model(["assigned_to_ids"])
+        self.env["okr.recontact.log"].flush_model(["user_id", "applicant_id", "date"])
+
+    def _aggregate_query(self, keys=None):
+        """Aggregated facts, optionally restricted to some (user_id, company_id, day) keys."""
+        if keys:
+            user_ids = tuple({user_id for user_id, _company_id, _day in keys})
+            key_values = SQL(", ").join(SQL("(%s, %s, %s::date)", *key) for key in keys)
+        parts = []
+        for source, template in _FACT_SOURCES.items():
+            if keys:
+                user_column, day = (SQL(expr) for expr in _SOURCE_KEY[source])
+                # the plain user filter lets the planner use the index before matching the keys
+                where = SQL(
+                    "%s IN %s AND (%s, a.company_id, %s) IN (VALUES %s)",
+                    user_column, user_ids, user_column, day, key_values,
+                )
+            else:
+                where = SQL("TRUE")
+            columns = SQL(", ").join(
+                SQL.identifier(m) if m in _SOURCE_MEASURES[source] else SQL("0")
+                for m in MEASURES
+            )
+            parts.append(SQL(
+                "SELECT user_id, company_id, day, %s FROM (%s) AS %s",
+                columns, SQL(template.format(where="%s"), where), SQL.identifier(f"src_{source}"),
+            ))
+        return SQL(
+            "SELECT user_id, company_id, day, %s FROM (%s) AS facts GROUP BY user_id, company_id, day",
+            SQL(", ").join(SQL("SUM(%s)", SQL.identifier(m)) for m in MEASURES),
+            SQL(" UNION ALL ").join(parts),
+        )
+
+    @api.model
+    def _rebuild(self):
+        """Recompute the whole table from the source records."""
+        self._flush_sources()
+        self.env.cr.execute(SQL("DELETE FROM %s", SQL.identifier(self._table)))
+        self.env.cr.execute(SQL(
+            "INSERT INTO %s (user_id, company_id, day, %s) %s",
+            SQL.identifier(self._table),
+            SQL(", ").join(SQL.identifier(m) for m in MEASURES),
+            self._aggregate_query(),
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _refresh(self, keys):
+        """
+        Re-aggregate the facts of the given (user_id, company_id, day) keys:
+        the sources are only read for those keys, their rows are upserted and
+        the keys left without any event are deleted.
+        """
+        keys = {key for key in keys if all(key)}
+        if not keys:
+            return
+        self._flush_sources()
+        self.env.cr.execute(SQL(
+            """
+            WITH agg AS (%(aggregate)s),
+                 upserted AS (
+                     INSERT INTO %(table)s (user_id, company_id, day, %(measures)s)
+                     SELECT * FROM agg
+                     ON CONFLICT (company_id, user_id, day) DO UPDATE SET %(updates)s
+                 )
+            DELETE FROM %(table)s f
+             USING (VALUES %(keys)s) AS k(user_id, company_id, day)
+             WHERE f.user_id = k.user_id AND f.company_id = k.company_id AND f.day = k.day
+               AND NOT EXISTS (
+                       SELECT 1 FROM agg
+                        WHERE agg.user_id = k.user_id AND agg.company_id = k.company_id AND agg.day = k.day
+                   )
+            """,
+            aggregate=self._aggregate_query(keys),
+            table=SQL.identifier(self._table),
+            measures=SQL(", ").join(SQL.identifier(m) for m in MEASURES),
+            updates=SQL(", ").join(SQL("%s = EXCLUDED.%s", SQL.identifier(m), SQL.identifier(m)) for m in MEASURES),
+            keys=SQL(", ").join(SQL("(%s, %s, %s::date)", *key) for key in keys),
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _sum_by_user(self, company_id, date_start, date_end, user_ids, measures):
+        """Range sums over [date_start, date_end) -> {user_id: {measure: total}}."""
+        groups = self.sudo()._read_group(
+            [
+                ("company_id", "=", company_id),
+                ("user_id", "in", list(user_ids)),
+                ("day", ">=", date_start),
+                ("day", "<", date_end),
+            ],
+            groupby=["user_id"],
+            aggregates=[f"{m}:sum" for m in measures],
+        )
+        totals = defaultdict(dict)
+        for user, *sums in groups:
+            totals[user.id] = {m: value or 0 for m, value in zip(measures, sums)}
+        return totals
@@ -10,3 +10,8 @@ class ResCompany(models.Model):
         default=0.7,
     )
 
+    okr_freeze_grace_days = fields.Integer(
+        string="OKR Freeze Grace Days",
+        default=7,
+        help="Days after the end of a period before its OKR nodes are frozen.",
+    )
@@ -8,4 +8,9 @@ class ResConfigSettings(models.TransientModel):
         string="OKR Success Points Threshold",
         related="company_id.okr_success_points_threshold",
         readonly=False,
-    )
\ No newline at end of file
+    )
+    okr_freeze_grace_days = fields.Integer(
+        string="OKR Freeze Grace Days",
+        related="company_id.okr_freeze_grace_days",
+        readonly=False,
+    )
@@ -2,6 +2,9 @@
 from odoo import fields, models, api, _
 from odoo.exceptions import ValidationError
 
+# fields read by the OKR KPIs: changing them marks the assigned recruiters' metrics dirty
+OKR_TRACKED_NEED_FIELDS = {"state", "assigned_date", "assigned_to_ids", "number_of_positions", "staffing_plan_id"}
+
 
 class StaffingNeed(models.Model):
     _name = "staffing.need"
@@ -42,6 +45,11 @@ class StaffingNeed(models.Model):
         compute="_compute_positions_filled",
         store=True,
     )
+    remaining_positions = fields.Integer(
+        string="Postes restants",
+        compute="_compute_remaining_positions",
+        store=True,
+    )
     cv_sent_count = fields.Integer(
         string="CV envoyés",
         compute="_compute_pipeline_counts",
@@ -59,33 +67,84 @@ class StaffingNeed(models.Model):
         ("closed", "Clôturé"),
     ], default="draft", string="Statut")
 
-    @api.depends("applicant_ids.stage_id")
+    @api.depends("applicant_ids.stage_id.hired_stage", "applicant_ids.active")
     def _compute_positions_filled(self):
-        for need in self:
-            need.positions_filled = sum(
-                1 for app in need.applicant_ids if app.stage_id.hired_stage
+        # one grouped count for all saved needs; new records are counted in memory
+        saved = self.filtered("id")
+        hired = {
+            need.id: count
+            for need, count in self.env["hr.applicant"]._read_group(
+                [("staffing_need_id", "in", saved.ids), ("stage_id.hired_stage", "=", True)],
+                groupby=["staffing_need_id"],
+                aggregates=["__count"],
             )
+        } if saved else {}
+        for need in self:
+            if need.id:
+                need.positions_filled = hired.get(need.id, 0)
+            else:
+                need.positions_filled = sum(
+                    1 for app in need.applicant_ids if app.stage_id.hired_stage
+                )
+
+    @api.depends("number_of_positions", "positions_filled")
+    def _compute_remaining_positions(self):
+        for need in self:
+            need.remaining_positions = need.number_of_positions - need.positions_filled
 
     @api.depends("applicant_ids", "applicant_ids.presented_to_client_date", "applicant_ids.client_interview_status")
     def _compute_pipeline_counts(self):
-        for need in self:
-            need.cv_sent_count = len(need.applicant_ids)
-            need.client_interview_count = sum(
-                1 for app in need.applicant_ids if app.presented_to_client_date
+        # one grouped query for all saved needs (`:count` skips empty dates); new records are counted in memory
+        saved = self.filtered("id")
+        counts = {
+            need.id: (sent, presented)
+            for need, sent, presented in self.env["hr.applicant"]._read_group(
+                [("staffing_need_id", "in", saved.ids)],
+                groupby=["staffing_need_id"],
+                aggregates=["__count", "presented_to_client_date:count"],
             )
+        } if saved else {}
+        for need in self:
+            if need.id:
+                need.cv_sent_count, need.client_interview_count = counts.get(need.id, (0, 0))
+            else:
+                need.cv_sent_count = len(need.applicant_ids)
+                need.client_interview_count = sum(
+                    1 for app in need.applicant_ids if app.presented_to_client_date
+                )
 
+    # set by bulk imports that already validated every row (see staffing.need.import.wizard)
     @api.constrains("number_of_positions")
     def _check_positions(self):
+        if self.env.context.get("staffing_need_prevalidated"):
+            return
         for rec in self:
             if rec.number_of_positions < 1:
                 raise ValidationError(_("Le nombre de postes doit être >= 1."))
 
     @api.constrains("seniority_min")
     def _check_seniority_min(self):
+        if self.env.context.get("staffing_need_prevalidated"):
+            return
         for rec in self:
             if rec.seniority_min < 0:
                 raise ValidationError(_("La séniorité minimale doit être un nombre positif."))
 
+    def _get_okr_user_ids(self):
+        return set(self.assigned_to_ids.ids)
+
+    def write(self, vals):
+        tracked = OKR_TRACKED_NEED_FIELDS.intersection(vals)
+        okr_user_ids = self._get_okr_user_ids() if tracked else set()
+        # presentations are credited to the need's assignees
+        fact_keys = self.applicant_ids._get_fact_keys() if "assigned_to_ids" in vals else set()
+        result = super().write(vals)
+        if tracked:
+            self.env["okr.node.metric"]._mark_dirty_for_users(okr_user_ids | self._get_okr_user_ids())
+        if "assigned_to_ids" in vals:
+            self.env["okr.recruitment.fact"]._refresh(fact_keys | self.applicant_ids._get_fact_keys())
+        return result
+
     def action_assign(self):
         for rec in self:
             rec.state = "assigned"
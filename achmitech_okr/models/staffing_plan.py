@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 from odoo import fields, models, api, _
 from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+from odoo.addons.achmitech_okr.tools import RelationBackfill
 
 class StaffingPlan(models.Model):
     _name = "staffing.plan"
@@ -49,36 +52,49 @@ class StaffingPlan(models.Model):
                 plan.state = "expired"
 
     @api.depends(
-        "date_from", "date_to",
+        "date_from", "date_to", "company_id",
         "staffing_need_ids",
         "staffing_need_ids.applicant_ids.presented_to_client_date",
         "staffing_need_ids.applicant_ids.client_interview_status",
     )
     def _compute_client_interview_kpis(self):
-        Applicant = self.env["hr.applicant"].sudo()
-        for plan in self:
-            plan.presented_sum = 0
-            plan.client_interview_passed_sum = 0
-            plan.client_interview_pass_rate = 0.0
-
-            if not plan.staffing_need_ids:
-                continue
-
-            domain = [
-                ("company_id", "=", plan.company_id.id),
-                ("staffing_need_id", "in", plan.staffing_need_ids.ids),
-                ("presented_to_client_date", "!=", False),
-            ]
-
-            # Match plan period (recommended)
-            if plan.date_from:
-                domain.append(("presented_to_client_date", ">=", plan.date_from))
-            if plan.date_to:
-                domain.append(("presented_to_client_date", "<=", plan.date_to))
-
-            presented = Applicant.search_count(domain)
-            passed = Applicant.search_count(domain + [("client_interview_status", "=", "passed")])
+        """
+        Applicants of the plan's company presented to the client during the
+        plan period (both bounds included), and how many of them passed the
+        EC: one aggregate query for the whole recordset. The plan scope is
+        passed as VALUES so that pending changes on the plans are honoured.
+        """
+        saved = self.filtered("id")
+        stats = {}
+        if saved:
+            self.env["staffing.need"].flush_model(["staffing_plan_id"])
+            self.env["hr.applicant"].flush_model(
+                ["staffing_need_id", "company_id", "presented_to_client_date", "client_interview_status", "active"]
+            )
+            self.env.cr.execute(SQL(
+                """
+                SELECT p.id,
+                       COUNT(a.id),
+                       COUNT(a.id) FILTER (WHERE a.client_interview_status = 'passed')
+                  FROM (VALUES %s) AS p(id, company_id, date_from, date_to)
+                  JOIN staffing_need n ON n.staffing_plan_id = p.id
+                  JOIN hr_applicant a ON a.staffing_need_id = n.id
+                 WHERE a.active
+                   AND a.company_id = p.company_id
+                   AND a.presented_to_client_date IS NOT NULL
+                   AND (p.date_from IS NULL OR a.presented_to_client_date >= p.date_from)
+                   AND (p.date_to IS NULL OR a.presented_to_client_date < p.date_to + 1)
+              GROUP BY p.id
+                """,
+                SQL(", ").join(
+                    SQL("(%s, %s, %s::date, %s::date)", plan.id, plan.company_id.id, plan.date_from, plan.date_to)
+                    for plan in saved
+                ),
+            ))
+            stats = {plan_id: (presented, passed) for plan_id, presented, passed in self.env.cr.fetchall()}
 
+        for plan in self:
+            presented, passed = stats.get(plan.id, (0, 0))
             plan.presented_sum = presented
             plan.client_interview_passed_sum = passed
             plan.client_interview_pass_rate = (passed / presented) if presented else 0.0
@@ -95,32 +111,111 @@ class StaffingPlan(models.Model):
             "target": "current",
         }
 
-    def action_migrate_assigned_to_ids(self):
-        needs = self.env["staffing.need"].sudo().search([
-            ("assigned_to", "!=", False),
-            ("company_id", "=", self.env.company.id),
-        ])
-        migrated = 0
-        for need in needs:
-            if need.assigned_to not in need.assigned_to_ids:
-                need.write({"assigned_to_ids": [(4, need.assigned_to.id)]})
-                migrated += 1
+    def _get_assigned_to_backfill(self):
+        return RelationBackfill(
+            self.env,
+            "staffing_need_assigned_to",
+            source_table="staffing_need",
+            source_column="assigned_to",
+            relation="staffing_need_user_rel",
+            column1="need_id",
+            column2="user_id",
+        )
+
+    def action_migrate_assigned_to_ids(self, commit=False):
+        """
+        Copy the legacy assigned_to (M2O) column into assigned_to_ids, for
+        every company, with one INSERT ... ON CONFLICT per chunk. Resumable:
+        rerun (e.g. from a shell with commit=True) after an interruption.
+        """
+        summary = self._get_assigned_to_backfill().run(commit=commit)
+        if summary["inserted"]:
+            # presentations are credited to the assignees: refresh what reads them
+            self.env["okr.recruitment.fact"]._rebuild()
+            self.env["okr.node.metric"]._mark_dirty_for_users(summary["column2_ids"])
         return {
             "type": "ir.actions.client",
             "tag": "display_notification",
             "params": {
                 "title": _("Migration terminée"),
-                "message": _("%d besoins mis à jour.") % migrated,
+                "message": _("%(scanned)d besoins parcourus, %(inserted)d affectations ajoutées.", **summary),
                 "type": "success",
                 "sticky": True,
             },
         }
 
+    @api.model
+    def _get_transferable_need_domain(self):
+        return [("state", "!=", "closed"), ("remaining_positions", ">", 0)]
+
+    @api.model
+    def _rollover_needs(self, plan_mapping):
+        """
+        Move the open needs with remaining positions of each source plan to
+        its target plan, e.g. for the quarterly rollover.
+
+        `plan_mapping` is {source_plan_id: target_plan_id}. The needs are
+        counted with one grouped query, resolved before anything is moved and
+        moved with one write per target plan. Returns a summary:
+        {"needs": n, "positions": n, "plans": [{"source_plan_id", "target_plan_id", "needs", "positions"}]}
+        """
+        plan_mapping = {int(source): int(target) for source, target in plan_mapping.items() if source and target}
+        plans = self.browse(set(plan_mapping) | set(plan_mapping.values())).exists()
+        for source_id, target_id in plan_mapping.items():
+            source, target = self.browse(source_id), self.browse(target_id)
+            if source not in plans or target not in plans:
+                raise UserError(_("Plan introuvable."))
+            if source == target:
+                raise UserError(_("Le plan cible de %s doit être différent du plan source.", source.name))
+            if source.company_id != target.company_id:
+                raise UserError(_("Les plans %s et %s n'appartiennent pas à la même société.", source.name, target.name))
+
+        Need = self.env["staffing.need"]
+        domain = self._get_transferable_need_domain() + [("staffing_plan_id", "in", list(plan_mapping))]
+        counts = Need._read_group(
+            domain,
+            groupby=["staffing_plan_id"],
+            aggregates=["__count", "remaining_positions:sum"],
+        )
+
+        # resolve the needs of every source before moving any, so that with chained
+        # mappings (A -> B, B -> C) the needs moved into B are not moved again to C
+        needs_by_target = {}
+        for need in Need.search(domain):
+            target_id = plan_mapping[need.staffing_plan_id.id]
+            needs_by_target[target_id] = needs_by_target.get(target_id, Need) | need
+        for target_id, needs in needs_by_target.items():
+            needs.write({"staffing_plan_id": target_id})
+
+        plan_summaries = [
+            {
+                "source_plan_id": plan.id,
+                "target_plan_id": plan_mapping[plan.id],
+                "needs": count,
+                "positions": positions or 0,
+            }
+            for plan, count, positions in counts
+        ]
+        return {
+            "needs": sum(p["needs"] for p in plan_summaries),
+            "positions": sum(p["positions"] for p in plan_summaries),
+            "plans": plan_summaries,
+        }
+
+    def action_open_need_import_wizard(self):
+        self.ensure_one()
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Importer des besoins"),
+            "res_model": "staffing.need.import.wizard",
+            "view_mode": "form",
+            "target": "new",
+            "context": {"default_staffing_plan_id": self.id},
+        }
+
     def action_transfer_needs(self):
         self.ensure_one()
-        transferable = self.staffing_need_ids.filtered(
-            lambda n: n.state != "closed" and n.positions_filled < n.number_of_positions
-        )
+        transferable = self.staffing_need_ids.filtered_domain(self._get_transferable_need_domain())
         if not transferable:
             raise UserError(_("Aucun besoin avec des postes restants à transférer."))
 
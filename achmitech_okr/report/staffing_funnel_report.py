@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, tools
+from odoo.tools import SQL
+
+
+class StaffingFunnelReport(models.Model):
+    """
+    Recruitment funnel of the staffing needs (CV envoyé → présenté → EC
+    terminé → embauché), backed by a SQL view.
+
+    One row per active applicant linked to a need, plus one row per need
+    without applicant so that it still shows up with its positions. The
+    need and plan dimensions are joined in the view, so pivots and graphs
+    are plain GROUP BY over it.
+    """
+    _name = "staffing.funnel.report"
+    _description = "Analyse du funnel de staffing"
+    _auto = False
+    _rec_name = "need_id"
+    _order = "date desc"
+
+    # dimensions
+    date = fields.Date(string="Date", readonly=True, help="Date d'envoi du CV, ou d'ouverture du besoin sans candidat.")
+    staffing_plan_id = fields.Many2one("staffing.plan", string="Staffing plan", readonly=True)
+    department_id = fields.Many2one("hr.department", string="Département", readonly=True)
+    company_id = fields.Many2one("res.company", string="Société", readonly=True)
+    need_id = fields.Many2one("staffing.need", string="Besoin", readonly=True)
+    need_state = fields.Selection([
+        ("draft", "Brouillon"),
+        ("assigned", "Affecté"),
+        ("closed", "Clôturé"),
+    ], string="Statut du besoin", readonly=True)
+    partner_id = fields.Many2one("res.partner", string="Client", readonly=True)
+    technology = fields.Char(string="Technologie clé", readonly=True)
+    urgency = fields.Selection([
+        ("1", "Urgente"),
+        ("2", "Normale"),
+        ("3", "Basse"),
+    ], string="Urgence", readonly=True)
+    assigned_date = fields.Date(string="Date d'affectation", readonly=True)
+    applicant_id = fields.Many2one("hr.applicant", string="Candidat", readonly=True)
+    user_id = fields.Many2one("res.users", string="Recruteur", readonly=True)
+    stage_id = fields.Many2one("hr.recruitment.stage", string="Étape", readonly=True)
+    presented_date = fields.Date(string="Date présentation client", readonly=True)
+    hired_date = fields.Date(string="Date premier recrutement", readonly=True)
+
+    # measures
+    positions = fields.Integer(string="Postes", readonly=True)
+    cv_count = fields.Integer(string="CV envoyés", readonly=True)
+    presented_count = fields.Integer(string="Présentés", readonly=True)
+    ec_passed_count = fields.Integer(string="EC terminés", readonly=True)
+    hired_count = fields.Integer(string="Embauchés", readonly=True)
+
+    def _query(self):
+        return SQL(
+            """
+            SELECT COALESCE(a.id, -n.id) AS id,
+                   COALESCE(a.create_date::date, n.date_opened, n.create_date::date) AS date,
+                   n.staffing_plan_id,
+                   p.department_id,
+                   n.company_id,
+                   n.id AS need_id,
+                   n.state AS need_state,
+                   n.partner_id,
+                   n.technology,
+                   n.urgency,
+                   n.assigned_date::date AS assigned_date,
+                   a.id AS applicant_id,
+                   a.user_id,
+                   a.stage_id,
+                   a.presented_to_client_date::date AS presented_date,
+                   a.date_first_hired AS hired_date,
+                   -- positions are counted once per need, on its first row
+                   CASE WHEN ROW_NUMBER() OVER (PARTITION BY n.id ORDER BY a.id) = 1
+                        THEN n.number_of_positions ELSE 0 END AS positions,
+                   (a.id IS NOT NULL)::int AS cv_count,
+                   (a.presented_to_client_date IS NOT NULL)::int AS presented_count,
+                   COALESCE(a.client_interview_status = 'passed', FALSE)::int AS ec_passed_count,
+                   COALESCE(s.hired_stage, FALSE)::int AS hired_count
+              FROM staffing_need n
+              JOIN staffing_plan p ON p.id = n.staffing_plan_id
+         LEFT JOIN hr_applicant a ON a.staffing_need_id = n.id AND a.active
+         LEFT JOIN hr_recruitment_stage s ON s.id = a.stage_id
+            """
+        )
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(SQL(
+            "CREATE OR REPLACE VIEW %s AS (%s)",
+            SQL.identifier(self._table),
+            self._query(),
+        ))
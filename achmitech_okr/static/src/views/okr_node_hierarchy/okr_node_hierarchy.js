@@ -1,11 +1,25 @@
+import { Component } from "@odoo/owl";
 import { registry } from "@web/core/registry";
+import { Layout } from "@web/search/layout";
 
 import { hierarchyView } from "@web_hierarchy/hierarchy_view";
 import { OkrHierarchyRenderer } from "./okr_node_hierarchy_renderer";
 
+/**
+ * The OKR tree is not loaded through the hierarchy model: the renderer fetches
+ * one level at a time from /achmitech_okr/hierarchy/level, so the first paint
+ * only costs one page of root nodes whatever the size of the tree.
+ */
+export class OkrHierarchyController extends Component {
+    static template = "achmitech_okr.OkrHierarchyController";
+    static components = { Layout, OkrHierarchyRenderer };
+    static props = ["*"];
+}
+
 export const okrHierarchyView = {
     ...hierarchyView,
-    Renderer: OkrHierarchyRenderer,
+    Controller: OkrHierarchyController,
+    props: (genericProps) => genericProps,
 };
 
 registry.category("views").add("okr_node_hierarchy", okrHierarchyView);
@@ -1,5 +1,100 @@
-import { HierarchyCard } from "@web_hierarchy/hierarchy_card";
+import { Component, useState } from "@odoo/owl";
+import { _t } from "@web/core/l10n/translation";
+import { rpc } from "@web/core/network/rpc";
+import { useService } from "@web/core/utils/hooks";
 
-export class OkrHierarchyCard extends HierarchyCard {
+export const HIERARCHY_LEVEL_ROUTE = "/achmitech_okr/hierarchy/level";
+
+const RESULT_CLASSES = {
+    new: "fa-circle-o",
+    inprogress: "fa-circle text-info",
+    successful: "fa-circle text-success",
+    failed: "fa-circle text-danger",
+};
+const RESULT_LABELS = {
+    new: _t("Nouveau"),
+    inprogress: _t("En Cours"),
+    successful: _t("Réussi"),
+    failed: _t("Échoué"),
+};
+const PROGRESS_CLASSES = {
+    inprogress: "bg-info",
+    successful: "bg-success",
+    failed: "bg-danger",
+};
+
+/**
+ * Fetch one page of one level of the tree -> {nodes, total}.
+ */
+export function loadHierarchyLevel(params, context) {
+    return rpc(HIERARCHY_LEVEL_ROUTE, { ...params, context });
+}
+
+export class OkrHierarchyCard extends Component {
     static template = "achmitech_okr.OkrHierarchyCard";
+    static props = {
+        node: Object,
+        context: Object,
+    };
+
+    setup() {
+        this.action = useService("action");
+        this.state = useState({ expanded: false, loading: false, children: [], total: 0 });
+    }
+
+    get node() {
+        return this.props.node;
+    }
+
+    get resultClass() {
+        return RESULT_CLASSES[this.node.result] || RESULT_CLASSES.new;
+    }
+
+    get resultLabel() {
+        return RESULT_LABELS[this.node.result] || "";
+    }
+
+    get progressClass() {
+        return PROGRESS_CLASSES[this.node.result] || "bg-secondary";
+    }
+
+    get progressWidth() {
+        return Math.max(0, Math.min(100, this.node.progress));
+    }
+
+    get hasMore() {
+        return this.state.children.length < this.state.total;
+    }
+
+    async loadChildren() {
+        this.state.loading = true;
+        try {
+            const { nodes, total } = await loadHierarchyLevel(
+                { parent_id: this.node.id, offset: this.state.children.length },
+                this.props.context
+            );
+            this.state.children.push(...nodes);
+            this.state.total = total;
+        } finally {
+            this.state.loading = false;
+        }
+    }
+
+    async toggleChildren() {
+        if (!this.state.expanded && !this.state.children.length) {
+            await this.loadChildren();
+        }
+        this.state.expanded = !this.state.expanded;
+    }
+
+    openRecord() {
+        this.action.doAction({
+            type: "ir.actions.act_window",
+            res_model: "okr.node",
+            res_id: this.node.id,
+            views: [[false, "form"]],
+        });
+    }
 }
+
+OkrHierarchyCard.components = { OkrHierarchyCard };
@@ -1,8 +1,43 @@
-import { HierarchyRenderer } from "@web_hierarchy/hierarchy_renderer";
-import { OkrHierarchyCard } from "./okr_node_hierarchy_card";
-export class OkrHierarchyRenderer extends HierarchyRenderer {
-    static components = {
-        ...HierarchyRenderer.components,
-        HierarchyCard: OkrHierarchyCard,
+import { Component, onWillStart, onWillUpdateProps, useState } from "@odoo/owl";
+import { loadHierarchyLevel, OkrHierarchyCard } from "./okr_node_hierarchy_card";
+
+export class OkrHierarchyRenderer extends Component {
+    static template = "achmitech_okr.OkrHierarchyRenderer";
+    static components = { OkrHierarchyCard };
+    static props = {
+        domain: Array,
+        context: Object,
     };
+
+    setup() {
+        this.state = useState({ loading: true, nodes: [], total: 0 });
+        onWillStart(() => this.load(this.props));
+        onWillUpdateProps((nextProps) => this.load(nextProps));
+    }
+
+    get hasMore() {
+        return this.state.nodes.length < this.state.total;
+    }
+
+    levelParams(props, offset = 0) {
+        return {
+            domain: props.domain,
+            res_id: props.context.hierarchy_res_id || false,
+            offset,
+        };
+    }
+
+    async load(props) {
+        const { nodes, total } = await loadHierarchyLevel(this.levelParams(props), props.context);
+        Object.assign(this.state, { loading: false, nodes, total });
+    }
+
+    async loadMore() {
+        const { nodes, total } = await loadHierarchyLevel(
+            this.levelParams(this.props, this.state.nodes.length),
+            this.props.context
+        );
+        this.state.nodes.push(...nodes);
+        this.state.total = total;
+    }
 }
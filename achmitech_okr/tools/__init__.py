@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+from .data_migration import RelationBackfill
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo.tools import SQL
+from odoo.tools.sql import column_exists
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+# ir.config_parameter prefix holding the checkpoint (last source id processed) of each migration
+CHECKPOINT_PREFIX = "achmitech_okr.migration."
+
+
+class RelationBackfill:
+    """
+    Chunked, resumable copy of a many2one column into a many2many relation
+    table, for field restructurings such as staffing.need.assigned_to →
+    assigned_to_ids.
+
+    Source rows are scanned by increasing id, `chunk_size` at a time; each
+    chunk is copied with a single INSERT ... SELECT ... ON CONFLICT DO
+    NOTHING, so rows already present in the relation are skipped and the
+    migration can be replayed safely. The last id processed is stored in
+    ir.config_parameter (`achmitech_okr.migration.<key>`): when chunks are
+    committed, an interrupted run resumes from there.
+
+        RelationBackfill(
+            env, "staffing_need_assigned_to",
+            source_table="staffing_need", source_column="assigned_to",
+            relation="staffing_need_user_rel", column1="need_id", column2="user_id",
+        ).run(commit=True)
+    """
+
+    def __init__(self, env, key, source_table, source_column, relation, column1, column2, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.env = env
+        self.key = key
+        self.source_table = source_table
+        self.source_column = source_column
+        self.relation = relation
+        self.column1 = column1
+        self.column2 = column2
+        self.chunk_size = chunk_size
+
+    @property
+    def _checkpoint_param(self):
+        return CHECKPOINT_PREFIX + self.key
+
+    def _get_checkpoint(self):
+        return int(self.env["ir.config_parameter"].sudo().get_param(self._checkpoint_param, 0))
+
+    def _set_checkpoint(self, last_id):
+        self.env["ir.config_parameter"].sudo().set_param(self._checkpoint_param, last_id)
+
+    def reset(self):
+        """Forget the checkpoint: the next run scans the source table from the start."""
+        self._set_checkpoint(0)
+
+    def _count_remaining(self, last_id):
+        self.env.cr.execute(SQL(
+            "SELECT COUNT(*) FROM %s WHERE id > %s AND %s IS NOT NULL",
+            SQL.identifier(self.source_table), last_id, SQL.identifier(self.source_column),
+        ))
+        return self.env.cr.fetchone()[0]
+
+    def _next_bound(self, last_id):
+        """Highest source id of the next chunk, or None when the scan is over."""
+        self.env.cr.execute(SQL(
+            """
+            SELECT MAX(id) FROM (
+                SELECT id FROM %(table)s
+                 WHERE id > %(last_id)s AND %(column)s IS NOT NULL
+              ORDER BY id
+                 LIMIT %(limit)s
+            ) AS chunk
+            """,
+            table=SQL.identifier(self.source_table),
+            column=SQL.identifier(self.source_column),
+            last_id=last_id,
+            limit=self.chunk_size,
+        ))
+        return self.env.cr.fetchone()[0]
+
+    def _copy_chunk(self, last_id, upper_id):
+        """Insert the missing relation rows of (last_id, upper_id] -> ids of column2 inserted."""
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO %(relation)s (%(column1)s, %(column2)s)
+            SELECT id, %(column)s
+              FROM %(table)s
+             WHERE id > %(last_id)s AND id <= %(upper_id)s AND %(column)s IS NOT NULL
+            ON CONFLICT DO NOTHING
+         RETURNING %(column2)s
+            """,
+            relation=SQL.identifier(self.relation),
+            column1=SQL.identifier(self.column1),
+            column2=SQL.identifier(self.column2),
+            table=SQL.identifier(self.source_table),
+            column=SQL.identifier(self.source_column),
+            last_id=last_id,
+            upper_id=upper_id,
+        ))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    def run(self, commit=False):
+        """
+        Copy the remaining chunks, logging progress after each one.
+
+        With `commit`, each chunk is committed together with its checkpoint
+        (cron/shell use); otherwise the whole run stays in the current
+        transaction. The ORM cache is invalidated at the end.
+
+        Returns {"inserted": n, "scanned": n, "column2_ids": set of ids inserted}.
+        """
+        summary = {"inserted": 0, "scanned": 0, "column2_ids": set()}
+        if not column_exists(self.env.cr, self.source_table, self.source_column):
+            _logger.info("Migration %s: column %s.%s not found, nothing to do", self.key, self.source_table, self.source_column)
+            return summary
+
+        self.env.flush_all()
+        last_id = self._get_checkpoint()
+        total = self._count_remaining(last_id)
+        while True:
+            upper_id = self._next_bound(last_id)
+            if upper_id is None:
+                break
+            inserted = self._copy_chunk(last_id, upper_id)
+            scanned = min(self.chunk_size, total - summary["scanned"])
+            summary["inserted"] += len(inserted)
+            summary["scanned"] += scanned
+            summary["column2_ids"].update(inserted)
+            last_id = upper_id
+            self._set_checkpoint(last_id)
+            if commit:
+                self.env.cr.commit()
+            _logger.info(
+                "Migration %s: %s/%s rows scanned, %s relation rows inserted",
+                self.key, summary["scanned"], total, summary["inserted"],
+            )
+
+        self.env.invalidate_all()
+        return summary
@@ -1,3 +1,5 @@
 from . import applicant_get_refuse_reason
 from . import okr_recontact_wizard
-from . import staffing_transfer_wizard
\ No newline at end of file
+from . import staffing_transfer_wizard
+from . import staffing_rollover_wizard
+from . import staffing_need_import_wizard
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+import base64
+import csv
+import io
+import unicodedata
+
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# rows created per batch
+IMPORT_BATCH_SIZE = 500
+# errors listed in the message when the file is rejected
+MAX_REPORTED_ERRORS = 20
+
+# accepted headers (accents, case and punctuation ignored) -> staffing.need field
+IMPORT_COLUMNS = {
+    "name": "name",
+    "poste": "name",
+    "partner_id": "partner_id",
+    "client": "partner_id",
+    "technology": "technology",
+    "technologie": "technology",
+    "technologie_cle": "technology",
+    "seniority_min": "seniority_min",
+    "seniorite_min": "seniority_min",
+    "urgency": "urgency",
+    "urgence": "urgency",
+    "number_of_positions": "number_of_positions",
+    "postes": "number_of_positions",
+    "nombre_de_postes": "number_of_positions",
+    "date_opened": "date_opened",
+    "date_d_ouverture": "date_opened",
+    "margin_rate": "margin_rate",
+    "marge": "margin_rate",
+    "taux_de_marge": "margin_rate",
+}
+URGENCY_VALUES = {"1": "1", "urgente": "1", "2": "2", "normale": "2", "3": "3", "basse": "3"}
+
+
+def _normalize(value):
+    value = unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode("ascii")
+    return "_".join("".join(c if c.isalnum() else " " for c in value.lower()).split())
+
+
+class StaffingNeedImportWizard(models.TransientModel):
+    _name = "staffing.need.import.wizard"
+    _description = "Import de besoins en personnel"
+
+    staffing_plan_id = fields.Many2one("staffing.plan", string="Staffing plan", required=True)
+    file = fields.Binary(string="Fichier (CSV ou XLSX)", required=True)
+    filename = fields.Char(string="Nom du fichier")
+    state = fields.Selection([("draft", "Brouillon"), ("done", "Terminé")], default="draft", readonly=True)
+    imported_count = fields.Integer(string="Besoins importés", readonly=True)
+
+    def _iter_rows(self):
+        """Yield (row number, {header: value}) from the uploaded file, one row at a time."""
+        data = base64.b64decode(self.file)
+        if (self.filename or "").lower().endswith(".xlsx"):
+            if openpyxl is None:
+                raise UserError(_("La bibliothèque openpyxl est requise pour importer des fichiers XLSX."))
+            sheet = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True).active
+            rows = sheet.iter_rows(values_only=True)
+        else:
+            text = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline="")
+            sample = text.read(4096)
+            text.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            rows = csv.reader(text, dialect)
+
+        headers = next(rows, None)
+        if not headers:
+            raise UserError(_("Le fichier est vide."))
+        columns = [IMPORT_COLUMNS.get(_normalize(header)) for header in headers]
+        if "name" not in columns or "number_of_positions" not in columns:
+            raise UserError(_("Les colonnes « Poste » et « Postes » sont obligatoires."))
+
+        for row_number, row in enumerate(rows, start=2):
+            if not any(cell not in (None, "") for cell in row):
+                continue
+            yield row_number, {field: cell for field, cell in zip(columns, row) if field}
+
+    def _parse_row(self, row):
+        """Convert one raw row to staffing.need values -> (vals, client name, [errors])."""
+        errors = []
+        vals = {"staffing_plan_id": self.staffing_plan_id.id}
+
+        name = str(row.get("name") or "").strip()
+        if not name:
+            errors.append(_("poste manquant"))
+        vals["name"] = name
+
+        for field, minimum, label in (
+            ("number_of_positions", 1, _("nombre de postes")),
+            ("seniority_min", 0, _("séniorité minimale")),
+        ):
+            raw = row.get(field)
+            if raw in (None, "") and field == "seniority_min":
+                continue
+            try:
+                number = float(str(raw).replace(",", "."))
+            except (TypeError, ValueError):
+                errors.append(_("%s invalide (%s)", label, raw))
+                continue
+            if not number.is_integer():
+                errors.append(_("%s doit être un nombre entier (%s)", label, raw))
+                continue
+            value = int(number)
+            if value < minimum:
+                errors.append(_("%s doit être >= %s", label, minimum))
+            vals[field] = value
+
+        if row.get("margin_rate") not in (None, ""):
+            try:
+                vals["margin_rate"] = float(str(row["margin_rate"]).replace(",", ".").rstrip("%"))
+            except ValueError:
+                errors.append(_("taux de marge invalide (%s)", row["margin_rate"]))
+
+        if row.get("urgency") not in (None, ""):
+            raw = row["urgency"]
+            # XLSX numeric cells come back as floats: 1.0 must read as "1"
+            if isinstance(raw, float) and raw.is_integer():
+                raw = int(raw)
+            urgency = URGENCY_VALUES.get(_normalize(raw))
+            if not urgency:
+                errors.append(_("urgence invalide (%s)", row["urgency"]))
+            vals["urgency"] = urgency
+
+        if row.get("date_opened") not in (None, ""):
+            try:
+                vals["date_opened"] = fields.Date.to_date(row["date_opened"])
+            except ValueError:
+                errors.append(_("date d'ouverture invalide (%s)", row["date_opened"]))
+
+        if row.get("technology"):
+            vals["technology"] = str(row["technology"]).strip()
+
+        return vals, str(row.get("partner_id") or "").strip(), errors
+
+    def _create_batch(self, batch, errors):
+        """
+        Resolve the clients of a batch of parsed rows with one search, report
+        the unknown ones in `errors`, and create the needs at once when no
+        error was met in the file so far. Returns the number of needs created.
+        """
+        names = {client for _row_number, _vals, client in batch if client}
+        partners = {}
+        if names:
+            for partner in self.env["res.partner"].search([("name", "in", list(names))], order="id"):
+                partners.setdefault(partner.name, partner.id)
+        vals_list = []
+        for row_number, vals, client in batch:
+            if client:
+                if client not in partners:
+                    errors.append(_("Ligne %s : client inconnu (%s)", row_number, client))
+                    continue
+                vals["partner_id"] = partners[client]
+            vals_list.append(vals)
+        if errors:
+            return 0
+        # every row was validated above: skip the per-record python constraints
+        self.env["staffing.need"].with_context(staffing_need_prevalidated=True).create(vals_list)
+        return len(vals_list)
+
+    def action_import(self):
+        """
+        Stream the file, validating every row and creating the needs by
+        batches of IMPORT_BATCH_SIZE. The import is all-or-nothing: once an
+        invalid row is met, the rest of the file is only validated and the
+        full list of errors is raised, rolling back the batches created so far.
+        """
+        self.ensure_one()
+        errors = []
+        batch = []
+        imported = 0
+        for row_number, row in self._iter_rows():
+            vals, client, row_errors = self._parse_row(row)
+            if row_errors:
+                errors.extend(_("Ligne %s : %s", row_number, error) for error in row_errors)
+                continue
+            batch.append((row_number, vals, client))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                imported += self._create_batch(batch, errors)
+                batch = []
+        if batch:
+            imported += self._create_batch(batch, errors)
+
+        if errors:
+            shown = errors[:MAX_REPORTED_ERRORS]
+            if len(errors) > len(shown):
+                shown.append(_("… et %s autre(s) erreur(s).", len(errors) - len(shown)))
+            raise UserError(_("Import annulé :\n%s", "\n".join(shown)))
+
+        self.write({"state": "done", "imported_count": imported})
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+
+class StaffingRolloverWizard(models.TransientModel):
+    _name = "staffing.rollover.wizard"
+    _description = "Assistant de reconduction des besoins"
+
+    state = fields.Selection([("draft", "Brouillon"), ("done", "Terminé")], default="draft", readonly=True)
+    line_ids = fields.One2many("staffing.rollover.wizard.line", "wizard_id", string="Plans")
+    moved_needs = fields.Integer(string="Besoins transférés", readonly=True)
+    moved_positions = fields.Integer(string="Postes transférés", readonly=True)
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if "line_ids" in fields_list and not res.get("line_ids") and self.env.context.get("active_model") == "staffing.plan":
+            res["line_ids"] = [(0, 0, {"source_plan_id": plan_id}) for plan_id in self.env.context.get("active_ids", [])]
+        return res
+
+    def action_confirm(self):
+        self.ensure_one()
+        lines = self.line_ids.filtered("target_plan_id")
+        if not lines:
+            raise UserError(_("Veuillez sélectionner au moins un plan cible."))
+
+        summary = self.env["staffing.plan"]._rollover_needs(
+            {line.source_plan_id.id: line.target_plan_id.id for line in lines}
+        )
+        by_source = {p["source_plan_id"]: p for p in summary["plans"]}
+        for line in lines:
+            plan_summary = by_source.get(line.source_plan_id.id, {})
+            line.write({
+                "moved_needs": plan_summary.get("needs", 0),
+                "moved_positions": plan_summary.get("positions", 0),
+            })
+        self.write({
+            "state": "done",
+            "moved_needs": summary["needs"],
+            "moved_positions": summary["positions"],
+        })
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+
+class StaffingRolloverWizardLine(models.TransientModel):
+    _name = "staffing.rollover.wizard.line"
+    _description = "Ligne de reconduction des besoins"
+
+    wizard_id = fields.Many2one("staffing.rollover.wizard", required=True, ondelete="cascade")
+    source_plan_id = fields.Many2one("staffing.plan", string="Plan source", required=True)
+    source_company_id = fields.Many2one(related="source_plan_id.company_id")
+    target_plan_id = fields.Many2one(
+        "staffing.plan",
+        string="Plan cible",
+        domain="[('id', '!=', source_plan_id), ('company_id', '=', source_company_id)]",
+    )
+    moved_needs = fields.Integer(string="Besoins transférés", readonly=True)
+    moved_positions = fields.Integer(string="Postes transférés", readonly=True)
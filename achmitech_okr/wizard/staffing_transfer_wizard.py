@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from odoo import fields, models, api, _
+from odoo import fields, models, _
 from odoo.exceptions import UserError
 
 
@@ -50,12 +50,4 @@ class StaffingTransferWizardLine(models.TransientModel):
     partner_id = fields.Many2one(related="need_id.partner_id", readonly=True)
     number_of_positions = fields.Integer(related="need_id.number_of_positions", readonly=True, string="Total")
     positions_filled = fields.Integer(related="need_id.positions_filled", readonly=True, string="Pourvus")
-    remaining_positions = fields.Integer(
-        string="À transférer",
-        compute="_compute_remaining",
-    )
-
-    @api.depends("need_id.number_of_positions", "need_id.positions_filled")
-    def _compute_remaining(self):
-        for line in self:
-            line.remaining_positions = line.need_id.number_of_positions - line.need_id.positions_filled
+    remaining_positions = fields.Integer(related="need_id.remaining_positions", readonly=True, string="À transférer")
@@ -38,15 +38,8 @@ class PortalLeaves(CustomerPortal):
         """Compute is_interim / is_client flags for template rendering only.
         Both flags are restricted to portal users — internal users (admin, HR, managers)
         must never see these cards even if they happen to have an hr.employee record."""
-        if not request.env.user.has_group('base.group_portal'):
-            return False, False
-        partner = request.env.user.partner_id
-        employee = self._get_interim_employee()
-        is_client = request.env['hr.employee'].sudo().search_count([
-            ('client_project_id.partner_id', '=', partner.id),
-            ('company_id', '=', request.env.company.id),
-        ]) > 0
-        return bool(employee), is_client
+        identity = request.env.user._get_portal_identity()
+        return identity.is_interim, identity.is_client
 
     @http.route(['/my', '/my/home'], type='http', auth='user', website=True)
     def home(self, **kw):
@@ -68,10 +61,7 @@ class PortalLeaves(CustomerPortal):
         return request.env.user.partner_id
 
     def _get_interim_employee(self):
-        return request.env['hr.employee'].sudo().search(
-            [('user_id', '=', request.env.user.id),
-             ('company_id', '=', request.env.company.id)], limit=1
-        )
+        return request.env.user._get_portal_identity().employee
 
     def _check_leave_access(self, leave_id):
         """Return the leave record, or raise 403 if the current user is not its client."""
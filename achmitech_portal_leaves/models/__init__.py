@@ -1,3 +1,5 @@
 from . import hr_employee
 from . import hr_leave_type
 from . import hr_leave
+from . import project_project
+from . import res_users
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields
+from odoo import api, models, fields
+
+# fields the portal identity of interims and clients depends on (see res.users._get_portal_identity)
+PORTAL_IDENTITY_FIELDS = {'user_id', 'client_project_id', 'company_id', 'active'}
 
 
 class HrEmployee(models.Model):
@@ -13,6 +16,24 @@ class HrEmployee(models.Model):
              "Le partenaire du projet est le client qui approuvera les absences.",
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        employees = super().create(vals_list)
+        if any(vals.get('user_id') or vals.get('client_project_id') for vals in vals_list):
+            self.env.registry.clear_cache()
+        return employees
+
+    def write(self, vals):
+        res = super().write(vals)
+        if PORTAL_IDENTITY_FIELDS.intersection(vals):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
 
 class HrEmployeePublic(models.Model):
     _inherit = 'hr.employee.public'
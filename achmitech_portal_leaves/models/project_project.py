@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models
+
+# fields the portal identity of a client depends on (see res.users._get_portal_identity)
+PORTAL_IDENTITY_FIELDS = {'partner_id', 'company_id', 'active'}
+
+
+class ProjectProject(models.Model):
+    _inherit = 'project.project'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        projects = super().create(vals_list)
+        if any(vals.get('partner_id') for vals in vals_list):
+            self.env.registry.clear_cache()
+        return projects
+
+    def write(self, vals):
+        res = super().write(vals)
+        if PORTAL_IDENTITY_FIELDS.intersection(vals):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
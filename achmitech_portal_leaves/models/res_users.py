@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+
+from odoo import models, tools
+
+# Who the user is on the portal, for the current company:
+#   employee        -- hr.employee linked to the user (interim), may be empty
+#   client_projects -- project.project whose partner is the user's partner
+#   is_interim      -- portal user with an employee
+#   is_client       -- portal user whose partner is the client of an interim's mission
+PortalIdentity = namedtuple("PortalIdentity", ["employee", "client_projects", "is_interim", "is_client"])
+
+
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    def _get_portal_identity(self):
+        """Portal identity of the user in the current company.
+
+        Resolved once per user and company and kept in the registry cache,
+        which is cleared when an employee's user or mission, or a project's
+        client, changes.
+        """
+        self.ensure_one()
+        company = self.env.company
+        employee_id, project_ids, is_interim, is_client = self._get_portal_identity_ids(company.id)
+        return PortalIdentity(
+            self.env['hr.employee'].sudo().browse(employee_id),
+            self.env['project.project'].sudo().browse(project_ids),
+            is_interim,
+            is_client,
+        )
+
+    def _get_portal_client_project_domain(self, company_id):
+        return [
+            ('partner_id', '=', self.partner_id.id),
+            ('company_id', '=', company_id),
+        ]
+
+    @tools.ormcache('self.id', 'company_id')
+    def _get_portal_identity_ids(self, company_id):
+        employee = self.env['hr.employee'].sudo().search([
+            ('user_id', '=', self.id),
+            ('company_id', '=', company_id),
+        ], limit=1)
+        projects = self.env['project.project'].sudo().search(
+            self._get_portal_client_project_domain(company_id)
+        )
+        # both flags are restricted to portal users: internal users (admin, HR,
+        # managers) must never get the portal cards, even with an employee
+        is_portal = self.has_group('base.group_portal')
+        is_client = is_portal and bool(self.env['hr.employee'].sudo().search_count([
+            ('client_project_id.partner_id', '=', self.partner_id.id),
+            ('company_id', '=', company_id),
+        ], limit=1))
+        return employee.id, tuple(projects.ids), is_portal and bool(employee), is_client
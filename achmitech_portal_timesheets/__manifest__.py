@@ -24,18 +24,27 @@
     'version': "19.0.1",
 
     # any module necessary for this one to work correctly
-    'depends': ['base', 'project', 'hr_timesheet', 'hr_holidays', 'portal'],
+    'depends': ['base', 'project', 'hr_timesheet', 'hr_holidays', 'portal', 'achmitech_portal_leaves'],
 
     # always loaded
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
         'views/project_task.xml',
         'wizard/employee_timesheet_wizard.xml',
         'views/portal_task_template.xml',
+        'views/portal_timesheet_grid.xml',
         'views/portal_client_timesheets.xml',
         'views/hr_employee_form_view.xml',
         'report/report_timesheet_inherited.xml',
+        'views/employee_timesheet_batch_views.xml',
     ],
+
+    'assets': {
+        'web.assets_frontend': [
+            'achmitech_portal_timesheets/static/src/js/**/*',
+        ],
+    },
     
     'license': 'LGPL-3',
 }
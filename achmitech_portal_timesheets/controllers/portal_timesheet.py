@@ -1,11 +1,18 @@
 # -*- coding: utf-8 -*-
 import calendar as cal_module
+from collections import defaultdict
+from datetime import date, timedelta
+
 from markupsafe import Markup, escape
 from odoo import http, fields
 from odoo.http import request
+from werkzeug.exceptions import NotFound
 from odoo.addons.portal.controllers.portal import CustomerPortal
 from odoo.addons.hr_timesheet.controllers.project import ProjectCustomerPortal as HrTimesheetProjectPortal
 
+# allowed day fractions for an interim entry (stored as ratio * 8 hours)
+DAY_RATIOS = (0.0, 0.5, 1.0)
+
 MONTH_NAMES_FR = ['', 'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
                   'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre']
 
@@ -20,10 +27,7 @@ class AchPortalTimesheetTask(HrTimesheetProjectPortal):
 
     def _task_get_page_view_values(self, task, access_token, **kwargs):
         values = super()._task_get_page_view_values(task, access_token, **kwargs)
-        employee = request.env["hr.employee"].sudo().search([
-            ("user_id", "=", request.env.user.id),
-            ("company_id", "=", request.env.company.id),
-        ], limit=1)
+        employee = request.env.user._get_portal_identity().employee
         if employee and task.project_id:
             values['timesheets'] = request.env['account.analytic.line'].sudo().search([
                 ('task_id', '=', task.id),
@@ -38,19 +42,22 @@ class PortalTimesheet(CustomerPortal):
     # ── Helpers ───────────────────────────────────────────────────────────────
 
     def _get_employee_for_portal_user(self):
-        return request.env["hr.employee"].sudo().search([
-            ("user_id", "=", request.env.user.id),
-            ("company_id", "=", request.env.company.id),
-        ], limit=1)
+        return request.env.user._get_portal_identity().employee
 
     def _get_client_projects(self):
         """Projects where the current portal user is the client (project.partner_id)."""
-        partner = request.env.user.partner_id
-        return request.env["project.project"].sudo().search([
-            ("partner_id", "=", partner.id),
-            ("allow_timesheets", "=", True),
-            ("company_id", "=", request.env.company.id),
-        ])
+        return request.env.user._get_portal_identity().client_projects
+
+    def _check_task_for_entry(self, task):
+        """Error message if the current user cannot log time on the task, else None."""
+        project = task.project_id.sudo()
+        if not project or not project.allow_timesheets:
+            return "Cette tâche appartient à un projet qui n'autorise pas la saisie des feuilles de temps."
+        if request.env.user not in task.user_ids:
+            return "Vous n'êtes pas assigné(e) à cette tâche."
+        if task.stage_id and task.stage_id.fold:
+            return "Cette tâche est clôturée. Vous ne pouvez plus modifier vos feuilles de temps."
+        return None
 
     def _task_redirect(self, task):
         url = task.get_portal_url()
@@ -81,7 +88,7 @@ class PortalTimesheet(CustomerPortal):
             request.session["ts_flash"] = {"type": "danger", "message": "Veuillez choisir 0, 0,5 ou 1."}
             return self._task_redirect(task)
 
-        if ratio not in (0.0, 0.5, 1.0):
+        if ratio not in DAY_RATIOS:
             request.session["ts_flash"] = {"type": "danger", "message": "Valeur invalide. Choisissez 0, 0,5 ou 1."}
             return self._task_redirect(task)
 
@@ -94,18 +101,11 @@ class PortalTimesheet(CustomerPortal):
             request.session["ts_flash"] = {"type": "danger", "message": "Format de date invalide."}
             return self._task_redirect(task)
 
-        project = task.project_id.sudo()
-        if not project or not project.allow_timesheets:
-            request.session["ts_flash"] = {"type": "danger", "message": "Cette tâche appartient à un projet qui n'autorise pas la saisie des feuilles de temps."}
-            return self._task_redirect(task)
-
-        if request.env.user not in task.user_ids:
-            request.session["ts_flash"] = {"type": "danger", "message": "Vous n'êtes pas assigné(e) à cette tâche."}
-            return self._task_redirect(task)
-
-        if task.stage_id and task.stage_id.fold:
-            request.session["ts_flash"] = {"type": "danger", "message": "Cette tâche est clôturée. Vous ne pouvez plus modifier vos feuilles de temps."}
+        error = self._check_task_for_entry(task)
+        if error:
+            request.session["ts_flash"] = {"type": "danger", "message": error}
             return self._task_redirect(task)
+        project = task.project_id.sudo()
 
         existing = request.env["account.analytic.line"].sudo().search([
             ("employee_id", "=", employee.id),
@@ -143,48 +143,210 @@ class PortalTimesheet(CustomerPortal):
 
         return self._task_redirect(task)
 
-    # ── Client timesheet validation portal ────────────────────────────────────
+    # ── Interim grid entry (a whole month in one submit) ──────────────────────
 
-    @http.route("/my/client-timesheets", type="http", auth="user", website=True)
-    def portal_client_timesheets(self, month=None, year=None, **kwargs):
-        projects = self._get_client_projects()
+    def _get_grid_tasks(self, task_id=None):
+        """Open tasks of timesheet-enabled projects the current user is assigned to."""
+        domain = [
+            ("user_ids", "in", request.env.user.id),
+            ("project_id.allow_timesheets", "=", True),
+            ("stage_id.fold", "=", False),
+            ("company_id", "=", request.env.company.id),
+        ]
+        if task_id:
+            domain.append(("id", "=", task_id))
+        return request.env["project.task"].sudo().search(domain, order="project_id, sequence, id")
 
+    @http.route("/my/timesheets/grid", type="http", auth="user", website=True)
+    def portal_timesheet_grid(self, month=None, year=None, task_id=None, **kwargs):
+        employee = self._get_employee_for_portal_user()
+        if not employee:
+            request.session["ts_flash"] = {"type": "danger", "message": "Aucun employé n'est associé à votre compte. Veuillez contacter l'administrateur."}
+            return request.redirect("/my/tasks")
+
+        sel_month, sel_year, date_from, date_to = self._get_month_bounds(month, year)
+        try:
+            task_id = int(task_id or 0)
+        except (ValueError, TypeError):
+            task_id = 0
+        tasks = self._get_grid_tasks(task_id)
+
+        lines = request.env["account.analytic.line"].sudo().search([
+            ("employee_id", "=", employee.id),
+            ("task_id", "in", tasks.ids),
+            ("date", ">=", date_from),
+            ("date", "<=", date_to),
+            ("company_id", "=", request.env.company.id),
+        ]) if tasks else request.env["account.analytic.line"]
+
+        prev_month = sel_month - 1 if sel_month > 1 else 12
+        prev_year = sel_year if sel_month > 1 else sel_year - 1
+        next_month = sel_month + 1 if sel_month < 12 else 1
+        next_year = sel_year if sel_month < 12 else sel_year + 1
+
+        return request.render("achmitech_portal_timesheets.portal_timesheet_grid", {
+            "tasks": tasks,
+            "task_id": task_id,
+            "days": [date_from + timedelta(days=offset) for offset in range(date_to.day)],
+            "cells": {(line.task_id.id, line.date): line for line in lines},
+            "day_ratios": DAY_RATIOS,
+            "sel_month": sel_month,
+            "sel_year": sel_year,
+            "month_name": MONTH_NAMES_FR[sel_month],
+            "prev_month": prev_month,
+            "prev_year": prev_year,
+            "next_month": next_month,
+            "next_year": next_year,
+        })
+
+    @http.route("/my/timesheets/grid/save", type="jsonrpc", auth="user", methods=["POST"])
+    def portal_timesheet_grid_save(self, cells=None, **kwargs):
+        """Create or update the interim's lines for a list of (task_id, date, day_ratio) cells.
+
+        Everything is checked in one pass and existing lines are fetched with a
+        single search; valid cells are saved even if others are rejected.
+        Returns the counts of saved lines and one error per rejected cell.
+        """
+        employee = self._get_employee_for_portal_user()
+        if not employee:
+            return {"error": "Aucun employé n'est associé à votre compte. Veuillez contacter l'administrateur."}
+
+        errors = []
+        entries = {}
+        for index, cell in enumerate(cells or []):
+            try:
+                task_id = int(cell.get("task_id") or 0)
+                entry_date = fields.Date.to_date(cell.get("date"))
+                ratio = float(cell.get("day_ratio"))
+            except (AttributeError, ValueError, TypeError):
+                errors.append({"index": index, "message": "Saisie invalide."})
+                continue
+            if not (task_id and entry_date):
+                errors.append({"index": index, "message": "Veuillez saisir une date valide."})
+            elif ratio not in DAY_RATIOS:
+                errors.append({"index": index, "message": "Valeur invalide. Choisissez 0, 0,5 ou 1."})
+            else:
+                # a cell submitted twice: the last value wins
+                entries[task_id, entry_date] = (index, ratio, cell.get("name"))
+        if not entries:
+            return {"created": 0, "updated": 0, "errors": errors}
+
+        tasks = request.env["project.task"].sudo().browse({task_id for task_id, _date in entries}).exists()
+        task_errors = {task.id: self._check_task_for_entry(task) for task in tasks}
+
+        AnalyticLine = request.env["account.analytic.line"].sudo()
+        existing = {
+            (line.task_id.id, line.date): line
+            for line in AnalyticLine.search([
+                ("employee_id", "=", employee.id),
+                ("task_id", "in", tasks.ids),
+                ("date", "in", list({entry_date for _task_id, entry_date in entries})),
+                ("company_id", "=", request.env.company.id),
+            ])
+        }
+
+        to_create = []
+        to_write = defaultdict(AnalyticLine.browse)
+        for (task_id, entry_date), (index, ratio, name) in entries.items():
+            if task_id not in task_errors:
+                error = "La tâche sélectionnée est introuvable ou n'est plus disponible."
+            else:
+                error = task_errors[task_id]
+            line = existing.get((task_id, entry_date))
+            if not error and line and line.validated:
+                error = "Cette saisie a déjà été validée par le client et ne peut plus être modifiée."
+            if error:
+                errors.append({"index": index, "message": error})
+                continue
+
+            unit_amount = ratio * 8.0
+            if line:
+                if line.unit_amount != unit_amount or (name is not None and name.strip() != (line.name or "")):
+                    to_write[unit_amount, None if name is None else name.strip()] |= line
+            else:
+                task = tasks.browse(task_id)
+                to_create.append({
+                    "name": (name or "").strip(),
+                    "date": entry_date,
+                    "unit_amount": unit_amount,
+                    "project_id": task.project_id.id,
+                    "task_id": task_id,
+                    "employee_id": employee.id,
+                    "user_id": request.env.user.id,
+                    "company_id": request.env.company.id,
+                })
+
+        if to_create:
+            AnalyticLine.create(to_create)
+        for (unit_amount, name), lines in to_write.items():
+            vals = {"unit_amount": unit_amount}
+            if name is not None:
+                vals["name"] = name
+            lines.write(vals)
+
+        return {
+            "created": len(to_create),
+            "updated": sum(len(lines) for lines in to_write.values()),
+            "errors": sorted(errors, key=lambda error: error["index"]),
+        }
+
+    # ── Client timesheet validation portal ────────────────────────────────────
+
+    def _get_month_bounds(self, month, year):
+        """Selected (month, year) and its first/last day; defaults to the current month."""
         today = fields.Date.today()
         try:
             sel_year = int(year) if year else today.year
             sel_month = int(month) if month else today.month
         except (ValueError, TypeError):
             sel_year, sel_month = today.year, today.month
-
         sel_month = max(1, min(12, sel_month))
+        date_from = date(sel_year, sel_month, 1)
+        date_to = date(sel_year, sel_month, cal_module.monthrange(sel_year, sel_month)[1])
+        return sel_month, sel_year, date_from, date_to
+
+    def _get_pending_lines_domain(self, projects, date_from, date_to):
+        """Unvalidated task lines of the client projects over [date_from, date_to]."""
+        return [
+            ("project_id", "in", projects.ids),
+            ("task_id", "!=", False),
+            ("date", ">=", date_from),
+            ("date", "<=", date_to),
+            ("validated", "=", False),
+        ]
+
+    def _validate_lines(self, lines):
+        """Mark the lines as validated by the client, in one write."""
+        # Use _write() to bypass timesheet_grid._check_can_write, which blocks
+        # validated=True without env.su respect. Our module loads before timesheet_grid
+        # alphabetically so MRO overrides don't help here.
+        lines._write({"validated": True, "correction_requested": False})
+        # Keep timesheet_grid's last validated date tracking in sync (if installed).
+        if lines and hasattr(lines, "_update_last_validated_timesheet_date"):
+            lines._update_last_validated_timesheet_date()
 
-        from datetime import date as dt_date
-        date_from = dt_date(sel_year, sel_month, 1)
-        date_to = dt_date(sel_year, sel_month, cal_module.monthrange(sel_year, sel_month)[1])
+    @http.route("/my/client-timesheets", type="http", auth="user", website=True)
+    def portal_client_timesheets(self, month=None, year=None, **kwargs):
+        projects = self._get_client_projects()
+        sel_month, sel_year, date_from, date_to = self._get_month_bounds(month, year)
 
+        # Only one summary row per employee is rendered here; the lines of an
+        # employee are fetched from /my/client-timesheets/lines when expanded.
         groups = []
         if projects:
-            lines = request.env["account.analytic.line"].sudo().search([
-                ("project_id", "in", projects.ids),
-                ("task_id", "!=", False),
-                ("date", ">=", date_from),
-                ("date", "<=", date_to),
-                ("validated", "=", False),
-            ], order="employee_id, date asc")
-
-            emp_groups = {}
-            for line in lines:
-                emp_id = line.employee_id.id
-                if emp_id not in emp_groups:
-                    emp_groups[emp_id] = {
-                        "employee": line.employee_id,
-                        "lines": [],
-                        "total_days": 0.0,
-                    }
-                emp_groups[emp_id]["lines"].append(line)
-                emp_groups[emp_id]["total_days"] += line.unit_amount / 8.0
-
-            groups = list(emp_groups.values())
+            summary = request.env["account.analytic.line"].sudo()._read_group(
+                self._get_pending_lines_domain(projects, date_from, date_to),
+                groupby=["employee_id"],
+                aggregates=["__count", "unit_amount:sum", "date:min", "date:max"],
+                order="employee_id",
+            )
+            groups = [{
+                "employee": employee,
+                "line_count": count,
+                "total_days": (unit_amount or 0.0) / 8.0,
+                "date_first": date_first,
+                "date_last": date_last,
+            } for employee, count, unit_amount, date_first, date_last in summary]
 
         prev_month = sel_month - 1 if sel_month > 1 else 12
         prev_year = sel_year if sel_month > 1 else sel_year - 1
@@ -193,6 +355,7 @@ class PortalTimesheet(CustomerPortal):
 
         return request.render("achmitech_portal_timesheets.portal_client_timesheets", {
             "groups": groups,
+            "line_count": sum(grp["line_count"] for grp in groups),
             "no_access": not bool(projects),
             "sel_month": sel_month,
             "sel_year": sel_year,
@@ -203,6 +366,31 @@ class PortalTimesheet(CustomerPortal):
             "next_year": next_year,
         })
 
+    @http.route("/my/client-timesheets/lines", type="http", auth="user", website=True, methods=["GET"])
+    def portal_client_timesheet_lines(self, employee_id=None, month=None, year=None, **kwargs):
+        """Lines of one employee for the month, rendered as the accordion body fragment."""
+        projects = self._get_client_projects()
+        if not projects:
+            raise NotFound()
+        try:
+            employee_id = int(employee_id or 0)
+        except (ValueError, TypeError):
+            employee_id = 0
+        if not employee_id:
+            raise NotFound()
+        sel_month, sel_year, date_from, date_to = self._get_month_bounds(month, year)
+
+        lines = request.env["account.analytic.line"].sudo().search(
+            self._get_pending_lines_domain(projects, date_from, date_to) + [("employee_id", "=", employee_id)],
+            order="date asc, id asc",
+        )
+        return request.render("achmitech_portal_timesheets.portal_client_timesheet_lines", {
+            "lines": lines,
+            "total_days": sum(lines.mapped("unit_amount")) / 8.0,
+            "sel_month": sel_month,
+            "sel_year": sel_year,
+        })
+
     @http.route("/my/client-timesheets/validate", type="http", auth="user", website=True, methods=["POST"])
     def portal_client_timesheet_validate(self, **post):
         """Bulk-validate all unvalidated lines for one employee in the given month."""
@@ -220,25 +408,12 @@ class PortalTimesheet(CustomerPortal):
         if not (employee_id and sel_year and sel_month):
             return request.redirect("/my/client-timesheets")
 
-        from datetime import date as dt_date
-        date_from = dt_date(sel_year, sel_month, 1)
-        date_to = dt_date(sel_year, sel_month, cal_module.monthrange(sel_year, sel_month)[1])
+        sel_month, sel_year, date_from, date_to = self._get_month_bounds(sel_month, sel_year)
 
-        lines = request.env["account.analytic.line"].sudo().search([
-            ("employee_id", "=", employee_id),
-            ("project_id", "in", projects.ids),
-            ("task_id", "!=", False),
-            ("date", ">=", date_from),
-            ("date", "<=", date_to),
-            ("validated", "=", False),
-        ])
-        # Use _write() to bypass timesheet_grid._check_can_write, which blocks
-        # validated=True without env.su respect. Our module loads before timesheet_grid
-        # alphabetically so MRO overrides don't help here.
-        lines._write({"validated": True, "correction_requested": False})
-        # Keep timesheet_grid's last validated date tracking in sync (if installed).
-        if hasattr(lines, "_update_last_validated_timesheet_date"):
-            lines._update_last_validated_timesheet_date()
+        lines = request.env["account.analytic.line"].sudo().search(
+            self._get_pending_lines_domain(projects, date_from, date_to) + [("employee_id", "=", employee_id)]
+        )
+        self._validate_lines(lines)
 
         request.session["client_ts_flash"] = {
             "type": "success",
@@ -246,6 +421,58 @@ class PortalTimesheet(CustomerPortal):
         }
         return request.redirect(f"/my/client-timesheets?month={sel_month}&year={sel_year}")
 
+    @http.route("/my/client-timesheets/validate-batch", type="jsonrpc", auth="user", methods=["POST"])
+    def portal_client_timesheet_validate_batch(self, month=None, year=None, employee_ids=None, line_ids=None, **kwargs):
+        """Validate, for one month, all the lines of the given employees plus the given lines.
+
+        Returns the validated line ids and the remaining pending totals of the
+        touched employees, so that the page can be updated without a reload.
+        """
+        projects = self._get_client_projects()
+        if not projects:
+            return {"error": "Aucun projet ne vous est associé en tant que client."}
+        try:
+            employee_ids = [int(emp_id) for emp_id in employee_ids or []]
+            line_ids = [int(line_id) for line_id in line_ids or []]
+        except (ValueError, TypeError):
+            return {"error": "Sélection invalide."}
+        if not (employee_ids or line_ids):
+            return {"error": "Aucune saisie sélectionnée."}
+
+        sel_month, sel_year, date_from, date_to = self._get_month_bounds(month, year)
+        domain = self._get_pending_lines_domain(projects, date_from, date_to)
+        if employee_ids and line_ids:
+            domain += ["|", ("employee_id", "in", employee_ids), ("id", "in", line_ids)]
+        elif employee_ids:
+            domain += [("employee_id", "in", employee_ids)]
+        else:
+            domain += [("id", "in", line_ids)]
+
+        AnalyticLine = request.env["account.analytic.line"].sudo()
+        lines = AnalyticLine.search(domain)
+        touched_employee_ids = set(employee_ids) | set(lines.employee_id.ids)
+        self._validate_lines(lines)
+
+        remaining = {
+            employee.id: (count, unit_amount or 0.0)
+            for employee, count, unit_amount in AnalyticLine._read_group(
+                self._get_pending_lines_domain(projects, date_from, date_to)
+                + [("employee_id", "in", list(touched_employee_ids))],
+                groupby=["employee_id"],
+                aggregates=["__count", "unit_amount:sum"],
+            )
+        }
+        return {
+            "validated_count": len(lines),
+            "line_ids": lines.ids,
+            "employees": [{
+                "id": emp_id,
+                "line_count": remaining.get(emp_id, (0, 0.0))[0],
+                "total_days": remaining.get(emp_id, (0, 0.0))[1] / 8.0,
+            } for emp_id in sorted(touched_employee_ids)],
+            "message": f"{len(lines)} saisie(s) validée(s). Cette action est irréversible.",
+        }
+
     @http.route("/my/client-timesheets/validate-line/<int:line_id>", type="http", auth="user", website=True, methods=["POST"])
     def portal_client_timesheet_validate_line(self, line_id, **post):
         """Validate a single timesheet line."""
@@ -262,9 +489,7 @@ class PortalTimesheet(CustomerPortal):
         sel_month = sel_year = None
         if line:
             sel_month, sel_year = line.date.month, line.date.year
-            line._write({"validated": True, "correction_requested": False})
-            if hasattr(line, "_update_last_validated_timesheet_date"):
-                line._update_last_validated_timesheet_date()
+            self._validate_lines(line)
             request.session["client_ts_flash"] = {
                 "type": "success",
                 "message": f"La saisie du {line.date.strftime('%d/%m/%Y')} ({line.employee_id.name}) a été validée.",
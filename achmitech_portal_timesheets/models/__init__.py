@@ -2,4 +2,7 @@
 
 from . import hr_employee
 from . import hr_employee_public
-from . import account_analytic_line
\ No newline at end of file
+from . import account_analytic_line
+from . import project_project
+from . import res_users
+from . import employee_timesheet_batch
\ No newline at end of file
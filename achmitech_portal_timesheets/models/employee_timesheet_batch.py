@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+import calendar
+import io
+import logging
+import re
+import time
+import zipfile
+from collections import Counter
+from datetime import date, timedelta
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+MONTH_NAMES_FR = ['', 'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
+                  'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre']
+
+# Each worker renders one CRA at a time: the number of workers bounds the
+# number of wkhtmltopdf processes running in parallel for the batches.
+WORKER_CRONS = (
+    "achmitech_portal_timesheets.ir_cron_cra_batch_worker_1",
+    "achmitech_portal_timesheets.ir_cron_cra_batch_worker_2",
+)
+# a running line without heartbeat for that long is considered crashed and rendered again
+STALE_AFTER = timedelta(minutes=15)
+# stop and re-trigger after that many seconds to stay below the cron time limit
+TIME_BUDGET = 300
+
+
+class EmployeeTimesheetBatch(models.Model):
+    """
+    Month-end generation of the CRA of many consultants at once.
+
+    Starting a batch lists, with one grouped query, every (employee, project,
+    task) with validated timesheets in the month; each becomes a line rendered
+    in the background by the worker crons. Once all lines are processed the
+    PDFs are bundled in a ZIP attached to the batch.
+    """
+    _name = "employee.timesheet.batch"
+    _description = "CRA client par lots"
+    _order = "id desc"
+
+    name = fields.Char(string="Nom", compute="_compute_name", store=True)
+    company_id = fields.Many2one(
+        "res.company",
+        string="Société",
+        required=True,
+        default=lambda self: self.env.company,
+    )
+    period_month = fields.Selection(
+        selection=[(str(month), MONTH_NAMES_FR[month]) for month in range(1, 13)],
+        string="Mois",
+        required=True,
+        default=lambda self: str(fields.Date.today().month),
+    )
+    period_year = fields.Integer(
+        string="Année",
+        required=True,
+        default=lambda self: fields.Date.today().year,
+    )
+    project_ids = fields.Many2many(
+        "project.project",
+        string="Projets clients",
+        domain="[('company_id', '=', company_id)]",
+        help="Laisser vide pour inclure tous les projets des employés sélectionnés.",
+    )
+    employee_ids = fields.Many2many(
+        "hr.employee",
+        string="Employés",
+        domain="[('company_id', '=', company_id)]",
+        help="Laisser vide pour inclure tous les employés des projets sélectionnés.",
+    )
+
+    state = fields.Selection([
+        ("draft", "Brouillon"),
+        ("running", "En cours"),
+        ("done", "Terminé"),
+    ], default="draft", required=True, readonly=True)
+    line_ids = fields.One2many("employee.timesheet.batch.line", "batch_id", string="CRA", readonly=True)
+    line_count = fields.Integer(string="CRA", compute="_compute_progress")
+    line_done_count = fields.Integer(string="CRA générés", compute="_compute_progress")
+    line_failed_count = fields.Integer(string="CRA en échec", compute="_compute_progress")
+    progress = fields.Float(string="Progression", compute="_compute_progress")
+    attachment_id = fields.Many2one("ir.attachment", string="Archive ZIP", readonly=True)
+    date_done = fields.Datetime(string="Terminé le", readonly=True)
+
+    @api.depends("period_month", "period_year")
+    def _compute_name(self):
+        for batch in self:
+            batch.name = f"CRA {MONTH_NAMES_FR[int(batch.period_month or 0)]} {batch.period_year}"
+
+    def _compute_progress(self):
+        counts = {
+            (batch.id, state): count
+            for batch, state, count in self.env["employee.timesheet.batch.line"]._read_group(
+                [("batch_id", "in", self.ids)],
+                groupby=["batch_id", "state"],
+                aggregates=["__count"],
+            )
+        }
+        for batch in self:
+            total = sum(counts.get((batch.id, state), 0) for state in ("pending", "running", "done", "failed"))
+            batch.line_count = total
+            batch.line_done_count = counts.get((batch.id, "done"), 0)
+            batch.line_failed_count = counts.get((batch.id, "failed"), 0)
+            processed = batch.line_done_count + batch.line_failed_count
+            batch.progress = 100.0 * processed / total if total else 0.0
+
+    def _get_period(self):
+        self.ensure_one()
+        month, year = int(self.period_month), self.period_year
+        return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+    def _get_line_domain(self):
+        """Validated task lines of the batch scope, as rendered by the CRA report."""
+        self.ensure_one()
+        date_from, date_to = self._get_period()
+        domain = [
+            ("company_id", "=", self.company_id.id),
+            ("date", ">=", date_from),
+            ("date", "<=", date_to),
+            ("validated", "=", True),
+            ("task_id", "!=", False),
+        ]
+        if self.project_ids:
+            domain.append(("project_id", "in", self.project_ids.ids))
+        if self.employee_ids:
+            domain.append(("employee_id", "in", self.employee_ids.ids))
+        return domain
+
+    @api.model
+    def _trigger_workers(self):
+        for xmlid in WORKER_CRONS:
+            cron = self.env.ref(xmlid, raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger()
+
+    def action_start(self):
+        """List the CRA to produce and hand them over to the workers."""
+        for batch in self:
+            if batch.state != "draft":
+                continue
+            if not (batch.project_ids or batch.employee_ids):
+                raise UserError(_("Veuillez sélectionner au moins un projet ou un employé."))
+            groups = self.env["account.analytic.line"].sudo()._read_group(
+                batch._get_line_domain(),
+                groupby=["employee_id", "project_id", "task_id"],
+            )
+            if not groups:
+                raise UserError(_("Aucune feuille de temps validée pour cette sélection sur %s.") % batch.name)
+            self.env["employee.timesheet.batch.line"].create([{
+                "batch_id": batch.id,
+                "employee_id": employee.id,
+                "project_id": project.id,
+                "task_id": task.id,
+            } for employee, project, task in groups])
+            batch.write({"state": "running", "attachment_id": False, "date_done": False})
+        self._trigger_workers()
+
+    def action_retry_failed(self):
+        """Render the failed CRA again and rebuild the archive."""
+        lines = self.line_ids.filtered(lambda line: line.state == "failed")
+        lines.write({"state": "pending", "error": False})
+        lines.batch_id.write({"state": "running", "date_done": False})
+        self._trigger_workers()
+
+    def action_download(self):
+        self.ensure_one()
+        if not self.attachment_id:
+            raise UserError(_("L'archive n'est pas encore disponible."))
+        return {
+            "type": "ir.actions.act_url",
+            "url": "/web/content/%d?download=true" % self.attachment_id.id,
+            "target": "self",
+        }
+
+    def _build_archive(self):
+        """Bundle the generated PDFs in a ZIP attached to the batch."""
+        self.ensure_one()
+        lines = self.line_ids.filtered(lambda line: line.state == "done" and line.attachment_id)
+        # the task is only needed in the file name when a consultant has several tasks on a project
+        tasks_per_pair = Counter((line.employee_id.id, line.project_id.id) for line in lines)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for line in lines:
+                with_task = tasks_per_pair[line.employee_id.id, line.project_id.id] > 1
+                archive.writestr(f"{line._get_report_base_filename(with_task)}.pdf", line.attachment_id.raw)
+        old_attachment = self.attachment_id
+        self.attachment_id = self.env["ir.attachment"].create({
+            "name": f"{self.name.replace(' ', '_')}.zip",
+            "raw": buffer.getvalue(),
+            "mimetype": "application/zip",
+            "res_model": self._name,
+            "res_id": self.id,
+        })
+        old_attachment.unlink()
+
+    @api.model
+    def _finalize_completed(self):
+        """Archive the running batches whose lines are all processed."""
+        batches = self.sudo().search([("state", "=", "running")])
+        open_batch_ids = {
+            batch.id for [batch] in self.env["employee.timesheet.batch.line"].sudo()._read_group(
+                [("batch_id", "in", batches.ids), ("state", "in", ("pending", "running"))],
+                groupby=["batch_id"],
+            )
+        }
+        for batch in batches.filtered(lambda b: b.id not in open_batch_ids):
+            # another worker may be archiving the same batch
+            self.env.cr.execute(SQL(
+                "SELECT id FROM %s WHERE id = %s AND state = 'running' FOR UPDATE SKIP LOCKED",
+                SQL.identifier(self._table), batch.id,
+            ))
+            if not self.env.cr.fetchone():
+                continue
+            batch._build_archive()
+            batch.write({"state": "done", "date_done": fields.Datetime.now()})
+            self.env.cr.commit()
+
+
+class EmployeeTimesheetBatchLine(models.Model):
+    _name = "employee.timesheet.batch.line"
+    _description = "CRA client d'un lot"
+    _order = "batch_id, employee_id, project_id, task_id"
+
+    batch_id = fields.Many2one("employee.timesheet.batch", required=True, ondelete="cascade", index=True, readonly=True)
+    employee_id = fields.Many2one("hr.employee", string="Employé", required=True, ondelete="cascade", readonly=True)
+    project_id = fields.Many2one("project.project", string="Projet client", required=True, ondelete="cascade", readonly=True)
+    task_id = fields.Many2one("project.task", string="Tâche", required=True, ondelete="cascade", readonly=True)
+    state = fields.Selection([
+        ("pending", "En attente"),
+        ("running", "En cours"),
+        ("done", "Généré"),
+        ("failed", "Échoué"),
+    ], default="pending", required=True, readonly=True, index=True)
+    heartbeat = fields.Datetime(string="Dernière activité", readonly=True)
+    attachment_id = fields.Many2one("ir.attachment", string="PDF", readonly=True)
+    error = fields.Text(string="Erreur", readonly=True)
+
+    def _get_report_base_filename(self, with_task=False):
+        """Same naming as the single CRA download of employee.timesheet.wizard."""
+        self.ensure_one()
+        batch = self.batch_id
+        parts = ["CRA", self.project_id.name, self.employee_id.name]
+        if with_task:
+            parts.append(self.task_id.name)
+        parts += [MONTH_NAMES_FR[int(batch.period_month)], str(batch.period_year)]
+        return re.sub(r'[\\/:*?"<>|]+', "-", "_".join(parts))
+
+    def _get_report_data(self):
+        """Parameters of the CRA report, as passed by employee.timesheet.wizard."""
+        self.ensure_one()
+        date_from, date_to = self.batch_id._get_period()
+        return {
+            "employee_id": self.employee_id.id,
+            "date_from": fields.Date.to_string(date_from),
+            "date_to": fields.Date.to_string(date_to),
+            "project_id": self.project_id.id,
+            "task_id": self.task_id.id,
+        }
+
+    def _render(self):
+        self.ensure_one()
+        company = self.batch_id.company_id
+        pdf, _report_type = self.env["ir.actions.report"].sudo().with_company(company)._render_qweb_pdf(
+            "achmitech_portal_timesheets.timesheet_report_interim",
+            res_ids=None,
+            data=self._get_report_data(),
+        )
+        self.attachment_id.unlink()
+        self.write({
+            "state": "done",
+            "error": False,
+            "heartbeat": fields.Datetime.now(),
+            "attachment_id": self.env["ir.attachment"].create({
+                "name": f"{self._get_report_base_filename()}.pdf",
+                "raw": pdf,
+                "mimetype": "application/pdf",
+                "res_model": self._name,
+                "res_id": self.id,
+            }).id,
+        })
+
+    @api.model
+    def _claim(self):
+        """Lock and mark as running the next pending (or crashed) line, if any."""
+        self.env.cr.execute(SQL(
+            """
+            SELECT id
+              FROM %s
+             WHERE state = 'pending'
+                OR (state = 'running' AND (heartbeat IS NULL OR heartbeat < %s))
+          ORDER BY id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+            """,
+            SQL.identifier(self._table),
+            fields.Datetime.now() - STALE_AFTER,
+        ))
+        row = self.env.cr.fetchone()
+        if not row:
+            return self.browse()
+        line = self.browse(row[0])
+        line.write({"state": "running", "heartbeat": fields.Datetime.now()})
+        self.env.cr.commit()
+        return line
+
+    @api.model
+    def _cron_process_lines(self):
+        deadline = time.monotonic() + TIME_BUDGET
+        while time.monotonic() < deadline:
+            line = self.sudo()._claim()
+            if not line:
+                self.env["employee.timesheet.batch"]._finalize_completed()
+                return
+            try:
+                line._render()
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.exception("CRA batch rendering failed: line=%s", line.id)
+                line.write({"state": "failed", "error": str(e)})
+            self.env.cr.commit()
+        # out of time: hand over the remaining lines to the next run
+        self.env["employee.timesheet.batch"]._trigger_workers()
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class ProjectProject(models.Model):
+    _inherit = "project.project"
+
+    def write(self, vals):
+        res = super().write(vals)
+        # client projects of the portal identity are restricted to timesheet projects
+        if "allow_timesheets" in vals:
+            self.env.registry.clear_cache()
+        return res
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class ResUsers(models.Model):
+    _inherit = "res.users"
+
+    def _get_portal_client_project_domain(self, company_id):
+        # only projects with timesheets have lines for the client to validate
+        return super()._get_portal_client_project_domain(company_id) + [("allow_timesheets", "=", True)]
@@ -0,0 +1,174 @@
+import publicWidget from "@web/legacy/js/public/public_widget";
+import { rpc } from "@web/core/network/rpc";
+
+const VALIDATE_BATCH_ROUTE = "/my/client-timesheets/validate-batch";
+
+publicWidget.registry.ClientTimesheets = publicWidget.Widget.extend({
+    selector: ".o_client_timesheets",
+    events: {
+        "submit form.o_validate_employee": "_onValidateEmployee",
+        "submit form.o_validate_line": "_onValidateLine",
+        "change .o_select_employee": "_onSelectEmployee",
+    },
+
+    start() {
+        // Bootstrap dispatches its events natively: listen without jQuery namespaces.
+        this._onShowEmployee = this._onShowEmployee.bind(this);
+        this._onShowRefuseModal = this._onShowRefuseModal.bind(this);
+        this.el.addEventListener("show.bs.collapse", this._onShowEmployee);
+        this.refuseModal = document.getElementById("refuse_modal");
+        this.refuseModal?.addEventListener("show.bs.modal", this._onShowRefuseModal);
+        this.selectionButton = document.querySelector(".o_validate_selection");
+        this._onValidateSelection = this._onValidateSelection.bind(this);
+        this.selectionButton?.addEventListener("click", this._onValidateSelection);
+        return this._super(...arguments);
+    },
+
+    destroy() {
+        this.el.removeEventListener("show.bs.collapse", this._onShowEmployee);
+        this.refuseModal?.removeEventListener("show.bs.modal", this._onShowRefuseModal);
+        this.selectionButton?.removeEventListener("click", this._onValidateSelection);
+        this._super(...arguments);
+    },
+
+    /**
+     * Fetch the lines of an employee the first time its section is expanded.
+     */
+    async _onShowEmployee(ev) {
+        const body = ev.target.querySelector(".o_client_timesheet_lines");
+        if (!body || body.dataset.loaded) {
+            return;
+        }
+        body.dataset.loaded = "1";
+        try {
+            const response = await fetch(body.dataset.url, { credentials: "same-origin" });
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            body.innerHTML = await response.text();
+        } catch {
+            delete body.dataset.loaded;
+            body.innerHTML = `<div class="alert alert-danger m-3">Impossible de charger les saisies.</div>`;
+        }
+    },
+
+    _onShowRefuseModal(ev) {
+        const button = ev.relatedTarget;
+        if (!button) {
+            return;
+        }
+        const modal = ev.target;
+        modal.querySelector("form").action = button.dataset.action;
+        modal.querySelector(".o_refuse_line_label").textContent = button.dataset.label;
+        modal.querySelector(".o_refuse_line_name").textContent = button.dataset.name;
+        modal.querySelector("textarea[name='reason']").value = "";
+    },
+
+    _onSelectEmployee() {
+        const selected = this.el.querySelectorAll(".o_select_employee:checked").length;
+        this.selectionButton?.classList.toggle("d-none", !selected);
+    },
+
+    _onValidateEmployee(ev) {
+        ev.preventDefault();
+        const item = ev.currentTarget.closest("[data-employee-id]");
+        this._validate({ employee_ids: [parseInt(item.dataset.employeeId)] });
+    },
+
+    _onValidateLine(ev) {
+        ev.preventDefault();
+        const row = ev.currentTarget.closest("[data-line-id]");
+        this._validate({ line_ids: [parseInt(row.dataset.lineId)] });
+    },
+
+    _onValidateSelection() {
+        const employeeIds = [...this.el.querySelectorAll(".o_select_employee:checked")].map(
+            (input) => parseInt(input.closest("[data-employee-id]").dataset.employeeId)
+        );
+        if (!employeeIds.length) {
+            return;
+        }
+        if (!confirm(`Valider toutes les saisies des ${employeeIds.length} collaborateur(s) sélectionné(s) pour ce mois ?\nCette action est irréversible.`)) {
+            return;
+        }
+        this._validate({ employee_ids: employeeIds });
+    },
+
+    /**
+     * Validate the given employees and/or lines of the displayed month in one
+     * call, then update the rows and counters in place.
+     */
+    async _validate({ employee_ids = [], line_ids = [] }) {
+        let result;
+        try {
+            result = await rpc(VALIDATE_BATCH_ROUTE, {
+                month: this.el.dataset.month,
+                year: this.el.dataset.year,
+                employee_ids,
+                line_ids,
+            });
+        } catch {
+            result = { error: "La validation a échoué, veuillez réessayer." };
+        }
+        if (result.error) {
+            this._showFlash("danger", result.error);
+            return;
+        }
+        for (const lineId of result.line_ids) {
+            this.el.querySelector(`tr[data-line-id="${lineId}"]`)?.remove();
+        }
+        for (const employee of result.employees) {
+            const item = this.el.querySelector(`[data-employee-id="${employee.id}"]`);
+            if (!item) {
+                continue;
+            }
+            if (!employee.line_count) {
+                item.remove();
+                continue;
+            }
+            item.querySelector(".o_ts_count").textContent = employee.line_count;
+            for (const days of item.querySelectorAll(".o_ts_days")) {
+                days.textContent = `${parseFloat(employee.total_days.toFixed(2))}j`;
+            }
+        }
+        this._updateCounters(result.validated_count);
+        this._onSelectEmployee();
+        this._showFlash("success", result.message);
+    },
+
+    _updateCounters(validatedCount) {
+        const items = this.el.querySelectorAll("[data-employee-id]").length;
+        if (!items) {
+            // nothing left to validate: reload to show the empty state
+            window.location.reload();
+            return;
+        }
+        const employeeCount = document.querySelector(".o_ts_employee_count");
+        const lineCount = document.querySelector(".o_ts_line_count");
+        if (employeeCount) {
+            employeeCount.textContent = items;
+        }
+        if (lineCount) {
+            lineCount.textContent = Math.max(0, parseInt(lineCount.textContent) - validatedCount);
+        }
+    },
+
+    _showFlash(type, message) {
+        const container = document.querySelector(".o_client_timesheets_flash");
+        if (!container) {
+            return;
+        }
+        const alert = document.createElement("div");
+        alert.className = `alert alert-${type} alert-dismissible fade show`;
+        alert.setAttribute("role", "alert");
+        alert.textContent = message;
+        const close = document.createElement("button");
+        close.type = "button";
+        close.className = "btn-close";
+        close.dataset.bsDismiss = "alert";
+        alert.appendChild(close);
+        container.replaceChildren(alert);
+    },
+});
+
+export default publicWidget.registry.ClientTimesheets;
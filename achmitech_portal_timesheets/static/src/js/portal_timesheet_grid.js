@@ -0,0 +1,103 @@
+import publicWidget from "@web/legacy/js/public/public_widget";
+import { rpc } from "@web/core/network/rpc";
+
+const GRID_SAVE_ROUTE = "/my/timesheets/grid/save";
+
+publicWidget.registry.TimesheetGrid = publicWidget.Widget.extend({
+    selector: ".o_timesheet_grid",
+    events: {
+        "change .o_timesheet_cell": "_onChangeCell",
+        "click .o_timesheet_grid_save": "_onSave",
+    },
+
+    start() {
+        for (const row of this.el.querySelectorAll("tbody tr")) {
+            this._updateRowTotal(row);
+        }
+        return this._super(...arguments);
+    },
+
+    _onChangeCell(ev) {
+        const cell = ev.currentTarget;
+        cell.classList.remove("is-invalid");
+        cell.removeAttribute("title");
+        this._updateRowTotal(cell.closest("tr"));
+    },
+
+    _updateRowTotal(row) {
+        const total = [...row.querySelectorAll(".o_timesheet_cell")].reduce(
+            (sum, cell) => sum + (parseFloat(cell.value) || 0),
+            0
+        );
+        row.querySelector(".o_timesheet_row_total").textContent = `${total}j`;
+    },
+
+    /**
+     * Send every modified cell in one call; rejected cells are flagged with
+     * their error, the others become the new reference values.
+     */
+    async _onSave(ev) {
+        const button = ev.currentTarget;
+        // an emptied cell cannot remove a line: only filled cells are sent
+        const changed = [...this.el.querySelectorAll(".o_timesheet_cell:not(:disabled)")].filter(
+            (cell) => cell.value !== "" && cell.value !== cell.dataset.initial
+        );
+        if (!changed.length) {
+            this._showFlash("info", "Aucune modification à enregistrer.");
+            return;
+        }
+        button.disabled = true;
+        let result;
+        try {
+            result = await rpc(GRID_SAVE_ROUTE, {
+                cells: changed.map((cell) => ({
+                    task_id: parseInt(cell.dataset.taskId),
+                    date: cell.dataset.date,
+                    day_ratio: cell.value,
+                })),
+            });
+        } catch {
+            result = { error: "L'enregistrement a échoué, veuillez réessayer." };
+        } finally {
+            button.disabled = false;
+        }
+        if (result.error) {
+            this._showFlash("danger", result.error);
+            return;
+        }
+        const rejected = new Map(result.errors.map((error) => [error.index, error.message]));
+        changed.forEach((cell, index) => {
+            if (rejected.has(index)) {
+                cell.classList.add("is-invalid");
+                cell.title = rejected.get(index);
+            } else {
+                cell.dataset.initial = cell.value;
+            }
+        });
+        const saved = result.created + result.updated;
+        if (rejected.size) {
+            this._showFlash(
+                "warning",
+                `${saved} saisie(s) enregistrée(s), ${rejected.size} refusée(s) : survolez les cases en rouge pour le détail.`
+            );
+        } else {
+            this._showFlash("success", `${saved} saisie(s) enregistrée(s).`);
+        }
+    },
+
+    _showFlash(type, message) {
+        const container = this.el.querySelector(".o_timesheet_grid_flash");
+        const alert = document.createElement("div");
+        alert.className = `alert alert-${type} alert-dismissible fade show`;
+        alert.setAttribute("role", "alert");
+        alert.textContent = message;
+        const close = document.createElement("button");
+        close.type = "button";
+        close.className = "btn-close";
+        close.dataset.bsDismiss = "alert";
+        alert.appendChild(close);
+        container.replaceChildren(alert);
+    },
+});
+
+export default publicWidget.registry.TimesheetGrid;